@@ -0,0 +1,147 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Solves many boards at once across a pool of worker processes, writing one JSON
+object per board to stdout as each solve finishes. For example:
+
+    python -m search.batch test-vis*.csv --workers 4 --timeout 30
+    python -m search.batch boards/ > results.jsonl
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from .board_io import parse_board
+from .program import search, check_options, SEARCH_ALGORITHMS
+from .solution_cache import SolutionCache
+from .stats import SearchStats
+
+
+class SolveTimeout(Exception):
+    """Raised inside a worker when a board runs past its time limit."""
+
+
+def _raise_timeout(signum, frame):
+    raise SolveTimeout()
+
+
+def find_boards(paths: list[str]) -> list[Path]:
+    """Expands the given board files and directories into a list of board files. Directories contribute every `.csv`
+    file directly inside them."""
+    boards = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            boards.extend(sorted(path.glob("*.csv")))
+        else:
+            boards.append(path)
+    return boards
+
+
+def solve_board(path: str, timeout: float | None = None, timing: bool = False, algorithm: str = "astar",
+                heuristic: str = "gaps", cache_path: str | None = None, prune: bool = False,
+                memory_limit: int | None = None) -> dict:
+    """Solves a single board file and returns a JSON-serialisable result. Runs inside a worker process. Any error
+    solving the board is reported in the result, with status "error", so one bad board never stops the batch."""
+    result = {"board": path}
+    solution_cache = None
+    stats = SearchStats(timing)
+    start = time.perf_counter()
+
+    # SIGALRM interrupts the search from inside the worker, which keeps the worker alive for the next board
+    use_alarm = timeout is not None and hasattr(signal, "setitimer")
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+    try:
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            if cache_path is not None:
+                solution_cache = SolutionCache(cache_path)
+            board, target = parse_board(Path(path).read_text())
+            sequence = search(board, target, stats=stats, algorithm=algorithm, heuristic=heuristic,
+                              solution_cache=solution_cache, prune=prune, memory_limit=memory_limit)
+        finally:
+            # Disarm the timer before anything else can run, and put back the old handler so that an alarm which
+            # is already pending cannot raise in the handlers below
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous_handler)
+        if sequence is None:
+            result.update(status="not_found", solution=None, cost=None)
+        else:
+            result.update(status="solved", solution=[str(action) for action in sequence], cost=len(sequence))
+    except SolveTimeout:
+        result.update(status="timeout", solution=None, cost=None)
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}", solution=None, cost=None)
+
+    if solution_cache is not None:
+        try:
+            solution_cache.close()
+        except Exception:
+            pass
+
+    result.update(stats.as_dict())
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+def solve_boards(paths: list[str], workers: int | None = None, timeout: float | None = None, timing: bool = False,
+                 algorithm: str = "astar", heuristic: str = "gaps", cache_path: str | None = None,
+                 prune: bool = False, memory_limit: int | None = None):
+    """Solves every board across a pool of worker processes, yielding each result as soon as it finishes."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(solve_board, path, timeout, timing, algorithm, heuristic, cache_path, prune,
+                                   memory_limit): path
+                   for path in paths}
+        for future in as_completed(futures):
+            # solve_board catches its own errors, so this only fails if the worker itself died
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"board": futures[future], "status": "error", "error": f"{type(e).__name__}: {e}",
+                       "solution": None, "cost": None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.batch", description="Solve many boards in parallel.")
+    parser.add_argument("paths", nargs="+", help="board files, or directories of .csv board files")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="time limit for each board in seconds (default: no limit)")
+    parser.add_argument("--timing", action="store_true", help="also report the time spent in each search phase")
+    parser.add_argument("-a", "--algorithm", choices=sorted(SEARCH_ALGORITHMS), default="astar",
+                        help="search algorithm to use (default: astar)")
+    parser.add_argument("--heuristic", choices=("gaps", "pdb"), default="gaps",
+                        help="heuristic to use (default: gaps)")
+    parser.add_argument("--solution-cache", metavar="PATH",
+                        help="persistent cache of solutions, shared by boards that are the same up to symmetry")
+    parser.add_argument("--prune", action="store_true",
+                        help="prune placements which only reorder commuting pieces (A* and IDA* only)")
+    parser.add_argument("--memory-limit", type=int, metavar="MB",
+                        help="memory to use before spilling to disk (external algorithm only, default: 512)")
+    args = parser.parse_args(argv)
+    try:
+        check_options(args.algorithm, prune=args.prune, memory_limit=args.memory_limit)
+    except ValueError as e:
+        parser.error(str(e))
+
+    boards = [str(path) for path in find_boards(args.paths)]
+    memory_limit = args.memory_limit * 1024 * 1024 if args.memory_limit is not None else None
+    for result in solve_boards(boards, args.workers, args.timeout, args.timing, args.algorithm, args.heuristic,
+                               args.solution_cache, args.prune, memory_limit):
+        print(json.dumps(result), flush=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
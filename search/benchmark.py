@@ -0,0 +1,135 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Benchmarks the solver over the test-vis boards, and gates against a saved
+baseline. For example:
+
+    python -m search.benchmark --repeat 3 --save-baseline baseline.json
+    python -m search.benchmark --repeat 3 --baseline baseline.json --threshold 0.2
+
+Each run of each board happens in a fresh process, so the peak RSS reported is
+for that board alone. The exit status is 1 if any board regressed.
+"""
+
+import argparse
+import json
+import resource
+import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .batch import solve_board
+
+DEFAULT_PATTERN = "test-vis*.csv"
+
+
+def _board_key(path: Path) -> tuple:
+    """Sorts test-vis2.csv before test-vis10.csv."""
+    digits = "".join(ch for ch in path.stem if ch.isdigit())
+    return (int(digits) if digits else 0, path.name)
+
+
+def measure_board(path: str, timeout: float | None) -> dict:
+    """Solves a board and adds the peak resident set size of the process in kilobytes. Runs in a fresh process."""
+    result = solve_board(path, timeout)
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def benchmark_board(path: str, repeat: int, timeout: float | None) -> dict:
+    """Runs a board `repeat` times, each in its own process, and summarises the runs. Wall time is the fastest run,
+    which is the least affected by noise from the rest of the machine."""
+    runs = []
+    for _ in range(repeat):
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            runs.append(executor.submit(measure_board, path, timeout).result())
+
+    times = [run["wall_time"] for run in runs]
+    first = runs[0]
+    return {
+        "board": Path(path).name,
+        "status": first["status"],
+        "cost": first["cost"],
+        "nodes_expanded": first["nodes_expanded"],
+        "nodes_generated": first["nodes_generated"],
+        "wall_time": min(times),
+        "wall_time_median": statistics.median(times),
+        "peak_rss_kb": max(run["peak_rss_kb"] for run in runs),
+    }
+
+
+def find_regressions(results: list[dict], baseline: dict, threshold: float, min_time: float) -> list[str]:
+    """Compares the results with a baseline, returning a description of each regression. A board regresses if its
+    solution cost changes, or its wall time or node count grows by more than `threshold` (a fraction). Time
+    differences below `min_time` seconds are ignored, as they are mostly noise."""
+    regressions = []
+
+    for result in results:
+        old = baseline.get(result["board"])
+        if old is None:
+            continue
+        name = result["board"]
+
+        if result["cost"] != old["cost"]:
+            regressions.append(f"{name}: solution cost changed from {old['cost']} to {result['cost']}")
+
+        time_limit = max(old["wall_time"] * (1 + threshold), old["wall_time"] + min_time)
+        if result["wall_time"] > time_limit:
+            regressions.append(f"{name}: wall time {result['wall_time']:.3f}s, baseline {old['wall_time']:.3f}s")
+
+        # Node counts are deterministic, so these do not need any slack for noise
+        if old["status"] == result["status"] == "solved" and \
+                result["nodes_expanded"] > old["nodes_expanded"] * (1 + threshold):
+            regressions.append(f"{name}: {result['nodes_expanded']} nodes expanded, "
+                               f"baseline {old['nodes_expanded']}")
+
+    return regressions
+
+
+def print_table(results: list[dict]):
+    print(f"{'board':<16}{'status':<11}{'cost':>5}{'expanded':>10}{'generated':>11}{'time (s)':>10}{'rss (MB)':>10}")
+    for result in results:
+        cost = "-" if result["cost"] is None else result["cost"]
+        print(f"{result['board']:<16}{result['status']:<11}{cost:>5}{result['nodes_expanded']:>10}"
+              f"{result['nodes_generated']:>11}{result['wall_time']:>10.3f}{result['peak_rss_kb'] / 1024:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.benchmark", description="Benchmark the solver.")
+    parser.add_argument("boards", nargs="*", help=f"board files to run (default: {DEFAULT_PATTERN} in the current "
+                                                  f"directory)")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="runs of each board (default: 3)")
+    parser.add_argument("-t", "--timeout", type=float, default=60, help="time limit for each run in seconds")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the results to a baseline file")
+    parser.add_argument("--baseline", metavar="PATH", help="fail if any board regressed from this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed fractional slowdown before a board counts as regressed (default: 0.2)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="slowdowns of less than this many seconds are ignored (default: 0.05)")
+    args = parser.parse_args(argv)
+
+    boards = [Path(board) for board in args.boards] or sorted(Path(".").glob(DEFAULT_PATTERN), key=_board_key)
+    results = [benchmark_board(str(board), args.repeat, args.timeout) for board in boards]
+    print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump({result["board"]: result for result in results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        regressions = find_regressions(results, baseline, args.threshold, args.min_time)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
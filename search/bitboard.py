@@ -0,0 +1,185 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import random
+
+from .core import PlayerColor, Coord, BOARD_N
+
+# Cells are packed row-major into the bits of an integer, so cell (r, c) lives at bit r * BOARD_N + c
+CELL_COUNT = BOARD_N * BOARD_N
+FULL_MASK = (1 << CELL_COUNT) - 1
+
+ROW_MASKS = tuple(((1 << BOARD_N) - 1) << (r * BOARD_N) for r in range(BOARD_N))
+COL_MASKS = tuple(sum(1 << (r * BOARD_N + c) for r in range(BOARD_N)) for c in range(BOARD_N))
+LINE_MASKS = ROW_MASKS + COL_MASKS
+
+# Constructing a Coord is expensive (it is a validated dataclass), so build each one only once
+INDEX_COORDS = tuple(Coord(i // BOARD_N, i % BOARD_N) for i in range(CELL_COUNT))
+
+# Zobrist keys for a red or a blue square in each cell. A board's hash is the XOR of the keys of its squares, which
+# lets it be updated incrementally as squares are placed and cleared. Seeded so hashes are the same on every run.
+_zobrist_random = random.Random(30024)
+ZOBRIST_RED = tuple(_zobrist_random.getrandbits(64) for _ in range(CELL_COUNT))
+ZOBRIST_BLUE = tuple(_zobrist_random.getrandbits(64) for _ in range(CELL_COUNT))
+
+# Union of the first k columns, for each k
+_FIRST_COLS = tuple(sum(COL_MASKS[:k]) for k in range(BOARD_N + 1))
+
+_NOT_FIRST_COL = FULL_MASK & ~COL_MASKS[0]
+_NOT_LAST_COL = FULL_MASK & ~COL_MASKS[BOARD_N - 1]
+
+
+def coord_index(coord: Coord) -> int:
+    """Returns the bit index of a board coordinate."""
+    return coord.r * BOARD_N + coord.c
+
+
+def coords_mask(coords) -> int:
+    """Packs an iterable of coordinates into a bitmask."""
+    mask = 0
+    for coord in coords:
+        mask |= 1 << (coord.r * BOARD_N + coord.c)
+    return mask
+
+
+def mask_indices(mask: int):
+    """Yields the bit index of every set cell in a mask, in ascending (row-major) order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_coords(mask: int) -> list[Coord]:
+    """Unpacks a bitmask into a sorted list of coordinates."""
+    return [INDEX_COORDS[i] for i in mask_indices(mask)]
+
+
+def zobrist(mask: int, keys) -> int:
+    """Returns the XOR of the Zobrist keys of every cell in the mask."""
+    key = 0
+    while mask:
+        low = mask & -mask
+        key ^= keys[low.bit_length() - 1]
+        mask ^= low
+    return key
+
+
+def neighbours(mask: int) -> int:
+    """Returns the mask of every cell orthogonally adjacent to a cell in the given mask, wrapping around the edges of
+    the board just like Coord arithmetic does."""
+    up = (mask >> BOARD_N) | (mask << (CELL_COUNT - BOARD_N))
+    down = (mask << BOARD_N) | (mask >> (CELL_COUNT - BOARD_N))
+    left = ((mask & _NOT_FIRST_COL) >> 1) | ((mask & COL_MASKS[0]) << (BOARD_N - 1))
+    right = ((mask & _NOT_LAST_COL) << 1) | ((mask & COL_MASKS[BOARD_N - 1]) >> (BOARD_N - 1))
+    return (up | down | left | right) & FULL_MASK
+
+
+def translate(mask: int, dr: int, dc: int) -> int:
+    """Moves every cell of the mask dr rows down and dc columns right, wrapping around the edges of the board."""
+    dr %= BOARD_N
+    dc %= BOARD_N
+    if dc:
+        # Cells in the first BOARD_N - dc columns move right, the rest wrap around to the start of their row
+        keep = _FIRST_COLS[BOARD_N - dc]
+        mask = ((mask & keep) << dc) | ((mask & ~keep) >> (BOARD_N - dc))
+    if dr:
+        shift = dr * BOARD_N
+        mask = ((mask << shift) | (mask >> (CELL_COUNT - shift))) & FULL_MASK
+    return mask
+
+
+def line_bits(mask: int, line: int, start: int, vertical: bool) -> int:
+    """Extracts one row (or column) of a mask as a BOARD_N bit integer, rotated so that bit 0 holds the cell at
+    position `start` along the line and bit k holds the cell k steps further down (or right)."""
+    bits = 0
+    for k in range(BOARD_N):
+        pos = (start + k) % BOARD_N
+        index = pos * BOARD_N + line if vertical else line * BOARD_N + pos
+        if mask >> index & 1:
+            bits |= 1 << k
+    return bits
+
+
+class BitBoard:
+    """A compact board state which packs the torus into two integer bitmasks: one for the blue cells and one for the
+    red cells. The Zobrist hash of the board is kept up to date as pieces are placed and lines are cleared, so hashing
+    a board is free.
+
+    Boards are immutable, so a child board shares every part of its parent that did not change. Placing a piece only
+    adds red cells, so the child reuses its parent's blue mask (the same int object) until a line clear removes blue
+    cells. Deep searches therefore store a single blue mask for whole subtrees of boards."""
+
+    __slots__ = ("blue", "red", "key")
+
+    def __init__(self, occupied=0, red=0, key=None):
+        self.blue = occupied & ~red
+        self.red = red
+        self.key = key if key is not None else zobrist(red, ZOBRIST_RED) ^ zobrist(self.blue, ZOBRIST_BLUE)
+
+    @classmethod
+    def _from_masks(cls, blue, red, key) -> 'BitBoard':
+        """Builds a board directly from its masks, reusing the given int objects rather than recomputing them."""
+        board = cls.__new__(cls)
+        board.blue = blue
+        board.red = red
+        board.key = key
+        return board
+
+    @property
+    def occupied(self) -> int:
+        """The mask of every occupied cell, red or blue."""
+        return self.blue | self.red
+
+    @classmethod
+    def from_dict(cls, board: dict[Coord, PlayerColor]) -> 'BitBoard':
+        """Converts the dictionary board used by the rest of the program into a bitboard."""
+        occupied = red = 0
+        for coord, color in board.items():
+            bit = 1 << coord_index(coord)
+            occupied |= bit
+            if color == PlayerColor.RED:
+                red |= bit
+        return cls(occupied, red)
+
+    def to_dict(self) -> dict[Coord, PlayerColor]:
+        """Converts this bitboard back into a dictionary board."""
+        board = {}
+        for i in mask_indices(self.occupied):
+            board[INDEX_COORDS[i]] = PlayerColor.RED if self.red >> i & 1 else PlayerColor.BLUE
+        return board
+
+    def frontier(self) -> int:
+        """Returns the mask of empty cells adjacent to a red cell, i.e. where a new piece can be started."""
+        return neighbours(self.red) & ~(self.blue | self.red)
+
+    def place(self, mask: int) -> 'BitBoard':
+        """Returns a new board with the cells of the mask filled in red. Lines are not cleared. The new board shares
+        this board's blue mask."""
+        return BitBoard._from_masks(self.blue, self.red | mask, self.key ^ zobrist(mask, ZOBRIST_RED))
+
+    def full_lines(self, lines) -> int:
+        """Returns the union of every full row and column out of the given line masks."""
+        occupied = self.blue | self.red
+        cleared = 0
+        for line in lines:
+            if occupied & line == line:
+                cleared |= line
+        return cleared
+
+    def clear(self, mask: int) -> 'BitBoard':
+        """Returns a new board with every cell of the mask emptied. The blue mask is only copied if blue cells were
+        actually cleared."""
+        red = mask & self.red
+        blue = mask & self.blue
+        key = self.key ^ zobrist(red, ZOBRIST_RED) ^ zobrist(blue, ZOBRIST_BLUE)
+        return BitBoard._from_masks(self.blue & ~mask if blue else self.blue, self.red & ~mask, key)
+
+    def __contains__(self, coord: Coord) -> bool:
+        return bool((self.blue | self.red) >> coord_index(coord) & 1)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, BitBoard) and self.red == other.red and self.blue == other.blue
+
+    def __hash__(self) -> int:
+        return self.key
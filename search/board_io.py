@@ -0,0 +1,29 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+from .core import PlayerColor, Coord
+
+
+def parse_board(text: str) -> tuple[dict[Coord, PlayerColor], Coord]:
+    """Parses a board in the same CSV format as the main program's input. Unlike `__main__.parse_input`, this raises
+    a ValueError for an invalid board instead of exiting, so it can be used when solving many boards at once."""
+    target = None
+    state = {}
+
+    for r, line in enumerate(text.strip().split("\n")):
+        if line.strip() == "" or line[0] == "#":
+            continue
+        for c, p in enumerate(line.split(",")):
+            p = p.strip()
+            if p == "":
+                continue
+            if p.lower() not in ("r", "b"):
+                raise ValueError(f"Invalid cell {p!r} at {r}-{c}")
+            state[Coord(r, c)] = PlayerColor.RED if p.lower() == "r" else PlayerColor.BLUE
+            if p == "B":
+                target = Coord(r, c)
+
+    if target is None:
+        raise ValueError("Target coordinate 'B' not found")
+
+    return state, target
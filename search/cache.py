@@ -0,0 +1,84 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 100_000
+
+
+def state_key(state):
+    """Returns a hashable key for a board state. Compact states (e.g. BitBoards) are their own key, and dictionary
+    boards are keyed by their contents."""
+    if isinstance(state, dict):
+        return frozenset(state.items())
+    return state
+
+
+class LRUCache:
+    """A mapping of bounded size which evicts the least recently used entry when it is full, and counts how often
+    lookups hit or miss so the size can be tuned."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the value for key (marking it as recently used), or default if it is not cached."""
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache a value, evicting the least recently used entry if the cache is full."""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def info(self):
+        """Return the hit/miss counters and current size, e.g. for SearchStats."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class CachedProblem:
+    """Wraps a search problem, memoising its heuristic values and action lists per state in LRU caches. Line clears
+    and different placement orders often bring the search back to boards which have already been evaluated."""
+
+    def __init__(self, problem, maxsize=DEFAULT_CACHE_SIZE):
+        self.problem = problem
+        self.heuristic_cache = LRUCache(maxsize)
+        self.actions_cache = LRUCache(maxsize)
+
+    def actions(self, state):
+        key = state_key(state)
+        actions = self.actions_cache.get(key)
+        if actions is None:
+            actions = self.problem.actions(state)
+            self.actions_cache.put(key, actions)
+        return actions
+
+    def heuristic(self, state):
+        key = state_key(state)
+        heuristic = self.heuristic_cache.get(key)
+        if heuristic is None:
+            heuristic = self.problem.heuristic(state)
+            self.heuristic_cache.put(key, heuristic)
+        return heuristic
+
+    def cache_info(self):
+        """Return the counters of both caches."""
+        return {"heuristic": self.heuristic_cache.info(), "actions": self.actions_cache.info()}
+
+    def __getattr__(self, name):
+        # Everything else (result, goal_test, path_cost, initial, target, ...) goes straight to the problem
+        return getattr(self.problem, name)
@@ -0,0 +1,348 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Behavioural checks for properties the solver relies on, which a change could
+break without any board visibly failing. For example:
+
+    python -m search.checks
+    python -m search.checks stream_split
+
+Each check raises an AssertionError if the property does not hold. The exit
+status is 1 if any check failed.
+"""
+
+import argparse
+import random
+import sys
+import time
+import traceback
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from .bitboard import BitBoard, INDEX_COORDS, coords_mask, mask_indices
+from .board_io import parse_board
+from .core import Coord, PlaceAction, PlayerColor, BOARD_N
+from .external import external_astar_search
+from .incremental import IncrementalSearch
+from .parallel import hda_star_search
+from .play_algorithms import (SearchNode, SearchProblem, astar_search, ida_star_search, multi_target_search,
+                              partial_expansion_search)
+from .program import search
+from .solution_cache import SolutionCache, SYMMETRIES
+from .stats import SearchStats
+from .stream import split_boards
+
+# The test-vis boards, which sit next to the package
+BOARD_DIR = Path(__file__).resolve().parent.parent
+# Solvable test-vis boards which the default search solves in well under a second
+QUICK_BOARDS = ("test-vis1.csv", "test-vis5.csv", "test-vis9.csv", "test-vis13.csv", "test-vis14.csv",
+                "test-vis16.csv", "test-vis17.csv", "test-vis19.csv")
+# Boards which A* with the "pdb" heuristic solves in about a second or less, with and without pruning
+PDB_BOARDS = ("test-vis1.csv", "test-vis4.csv", "test-vis5.csv", "test-vis6.csv", "test-vis7.csv", "test-vis9.csv")
+# Boards for comparing incremental search against fresh searches after each of a few random edits
+EDIT_BOARDS = ("test-vis1.csv", "test-vis2.csv", "test-vis5.csv", "test-vis9.csv", "test-vis13.csv")
+EDITS = 6
+# Boards whose solutions clear lines on the way, for edits which change whether those lines are cleared
+LINE_CLEAR_BOARDS = ("test-vis14.csv", "test-vis16.csv", "test-vis17.csv", "test-vis22.csv")
+LINE_EDITS = 2
+# Worker processes for HDA*, enough for children to be sent between workers
+HDA_WORKERS = 3
+# Memory limit for external A* in bytes, small enough that it spills to disk and forgets boards
+EXTERNAL_MEMORY_LIMIT = 64 * 1024
+# Blue squares of each board which multi-target search solves along with the board's own target
+EXTRA_TARGETS = 2
+# How many placements from the goal a board can be for its optimal cost to be found by brute force
+BRUTE_FORCE_DEPTH = 2
+SEED = 30024
+
+CHECKS: dict[str, Callable[[], None]] = {}
+
+
+def check(function: Callable[[], None]) -> Callable[[], None]:
+    """Registers a check under its name, without the `check_` prefix."""
+    CHECKS[function.__name__.removeprefix("check_")] = function
+    return function
+
+
+def read_board(name: str) -> str:
+    return (BOARD_DIR / name).read_text()
+
+
+def optimal_cost(state: BitBoard, target: Coord, max_depth: int = BRUTE_FORCE_DEPTH) -> int | None:
+    """The optimal cost of a board by brute force, breadth first without any heuristic, or None if it needs more
+    than `max_depth` placements."""
+    problem = SearchProblem(state, target)
+    layer = [SearchNode(state)]
+    seen = {state}
+    for _ in range(max_depth):
+        next_layer = []
+        for node in layer:
+            for child in node.expand(problem):
+                if problem.goal_test(child.state):
+                    return child.path_cost
+                if child.state not in seen:
+                    seen.add(child.state)
+                    next_layer.append(child)
+        layer = next_layer
+    return None
+
+
+def is_solution(board: dict[Coord, PlayerColor], target: Coord, sequence: list[PlaceAction]) -> bool:
+    """Whether every placement in the sequence is legal in turn and the last one removes the target."""
+    problem = SearchProblem(board, target)
+    state = problem.initial
+    for action in sequence:
+        if problem.goal_test(state):
+            return False
+        mask = coords_mask(action.coords)
+        if not any(coords_mask(legal.coords) == mask for legal in problem.actions(state)):
+            return False
+        state = problem.result(state, action)
+    return problem.goal_test(state)
+
+
+def move_board(board: dict[Coord, PlayerColor], target: Coord, symmetry, shift: tuple[int, int]):
+    """Rotates or reflects a board about its target by one of the solution cache's SYMMETRIES, then translates it by
+    `shift`. Returns the moved (board, target)."""
+    def move(coord):
+        r, c = symmetry(coord.r - target.r, coord.c - target.c)
+        return Coord((r + target.r + shift[0]) % BOARD_N, (c + target.c + shift[1]) % BOARD_N)
+
+    return {move(coord): color for coord, color in board.items()}, move(target)
+
+
+def commuting_board() -> tuple[dict[Coord, PlayerColor], Coord]:
+    """A board on which move order pruning is easy to get wrong. The target's row is empty and every cell of it is
+    next to one of a row of alternating red squares, so the three pieces which fill it can be placed in several
+    orders. The target's column is blocked every other square, so needs five pieces. Pruning both orders of a
+    commuting pair, rather than just one, loses every optimal solution here."""
+    target = Coord(0, 0)
+    board = {target: PlayerColor.BLUE}
+    for i in range(1, BOARD_N - 1, 2):
+        board[Coord(1, i)] = PlayerColor.RED
+        board[Coord(i, 0)] = PlayerColor.BLUE
+    return board, target
+
+
+def random_edit(rng: random.Random, board: dict[Coord, PlayerColor], target: Coord,
+                sequence: list[PlaceAction] | None = None) -> dict[Coord, PlayerColor | None]:
+    """A random edit for IncrementalSearch.edit: adds or removes a red square, adds a blue square, or moves one. The
+    current solution is not used, but is taken so that this and line_edit can be used in the same way."""
+    red = [coord for coord, color in board.items() if color == PlayerColor.RED]
+    blue = [coord for coord, color in board.items() if color == PlayerColor.BLUE and coord != target]
+    empty = [Coord(r, c) for r in range(BOARD_N) for c in range(BOARD_N) if Coord(r, c) not in board]
+
+    kind = rng.randrange(4)
+    if kind == 0 and len(red) > 1:
+        return {rng.choice(red): None}
+    if kind == 1:
+        return {rng.choice(empty): PlayerColor.RED}
+    if kind == 2 and blue:
+        return {rng.choice(blue): None, rng.choice(empty): PlayerColor.BLUE}
+    return {rng.choice(empty): PlayerColor.BLUE}
+
+
+def line_edit(rng: random.Random, board: dict[Coord, PlayerColor], target: Coord,
+              sequence: list[PlaceAction] | None) -> dict[Coord, PlayerColor | None]:
+    """An edit which removes a blue square from a line that the solution clears before its last placement, so that
+    the line is no longer cleared. Falls back to a random edit if there is no such square."""
+    problem = SearchProblem(board, target)
+    state = problem.initial
+    cleared = 0
+    for action in (sequence or [])[:-1]:
+        placed = state.occupied | coords_mask(action.coords)
+        state = problem.result(state, action)
+        cleared |= placed & ~state.occupied
+
+    blue = [INDEX_COORDS[i] for i in mask_indices(cleared & problem.initial.blue)]
+    blue = [coord for coord in blue if coord.r != target.r and coord.c != target.c]
+    if not blue:
+        return random_edit(rng, board, target, sequence)
+    return {rng.choice(blue): None}
+
+
+def near_goal_boards(rng: random.Random, children: int = 10):
+    """Yields (state, target) pairs close to a goal, from the solutions of the quick boards and a few random
+    placements off those solutions."""
+    for name in QUICK_BOARDS:
+        board, target = parse_board(read_board(name))
+        problem = SearchProblem(board, target)
+        path = astar_search(problem).path()
+        for node in path[-1 - BRUTE_FORCE_DEPTH:-1]:
+            yield node.state, target
+        node = path[-2]
+        for child in rng.sample(node.expand(problem), children):
+            if not problem.goal_test(child.state):
+                yield child.state, target
+
+
+@check
+def check_stream_split():
+    """A board with fewer than BOARD_N rows followed by another board splits into the two boards, whether they are
+    separated by headers or by a blank line. Without a separator, boards are never cut after BOARD_N rows, which
+    would silently mix the rows of two boards."""
+    short, full = read_board("test-vis9.csv"), read_board("test-vis5.csv")
+    expected = [parse_board(short), parse_board(full)]
+
+    # As in the stream module's example, where neither file ends in a newline
+    with_headers = f"# test-vis9.csv\n{short}\n# test-vis5.csv\n{full}\n"
+    boards = list(split_boards(with_headers.splitlines(keepends=True)))
+    assert [name for name, _ in boards] == ["test-vis9.csv", "test-vis5.csv"], boards
+    assert [parse_board(text) for _, text in boards] == expected
+
+    with_blank_line = f"{short}\n\n{full}"
+    boards = list(split_boards(with_blank_line.splitlines(keepends=True)))
+    assert [name for name, _ in boards] == ["1", "2"], boards
+    assert [parse_board(text) for _, text in boards] == expected
+
+    without_separator = f"{short}\n{full}"
+    boards = list(split_boards(without_separator.splitlines(keepends=True)))
+    assert len(boards) == 1, boards
+
+
+@check
+def check_pdb_admissible():
+    """The pattern database heuristic never overestimates the optimal cost found by brute force, which A* with "pdb"
+    relies on for its solutions to be optimal. Boards too far from the goal to brute force are skipped."""
+    rng = random.Random(SEED)
+    checked = 0
+    for state, target in near_goal_boards(rng):
+        cost = optimal_cost(state, target)
+        if cost is None:
+            continue
+        heuristic = SearchProblem(state, target, "pdb").heuristic(state)
+        assert heuristic <= cost, (state.to_dict(), target, heuristic, cost)
+        checked += 1
+    assert checked >= len(QUICK_BOARDS) * BRUTE_FORCE_DEPTH
+
+
+@check
+def check_solution_cache_symmetry():
+    """A solution stored in the solution cache is found again for all eight rotations and reflections of its board,
+    translated anywhere, and is a valid solution of the same length for each of them."""
+    rng = random.Random(SEED)
+    solution_cache = SolutionCache(":memory:")
+    try:
+        for name in QUICK_BOARDS:
+            board, target = parse_board(read_board(name))
+            sequence = search(board, target, heuristic="pdb", solution_cache=solution_cache)
+            assert sequence is not None and is_solution(board, target, sequence), name
+
+            for symmetry in SYMMETRIES:
+                moved_board, moved_target = move_board(board, target, symmetry,
+                                                       (rng.randrange(BOARD_N), rng.randrange(BOARD_N)))
+                found, cached = solution_cache.get(BitBoard.from_dict(moved_board), moved_target)
+                assert found, (name, moved_target)
+                assert len(cached) == len(sequence), (name, moved_target, cached)
+                assert is_solution(moved_board, moved_target, cached), (name, moved_target, cached)
+    finally:
+        solution_cache.close()
+
+
+@check
+def check_prune_optimal():
+    """Pruning commuting placements keeps the optimal cost, for both A* and IDA* with the admissible "pdb" heuristic,
+    and still gives valid solutions."""
+    boards = {name: parse_board(read_board(name)) for name in PDB_BOARDS}
+    boards["commuting"] = commuting_board()
+
+    pruned = 0
+    for name, (board, target) in boards.items():
+        for algorithm in (astar_search, ida_star_search):
+            optimal = algorithm(SearchProblem(board, target, "pdb"))
+            stats = SearchStats()
+            node = algorithm(SearchProblem(board, target, "pdb"), stats=stats, prune=True)
+            assert node is not None and node.path_cost == optimal.path_cost, (name, algorithm.__name__)
+            assert is_solution(board, target, node.solution()), (name, algorithm.__name__)
+            pruned += stats.nodes_pruned
+
+    # Otherwise the check would pass however broken the pruning was
+    assert pruned > 0
+
+
+@check
+def check_algorithms_optimal():
+    """External A*, PEA* and HDA* with the "pdb" heuristic each find a solution of the same cost as A* (or find none
+    when A* finds none), and their solutions are valid. So does multi-target search, for the board's own target and
+    a few other blue squares at once, each compared with an A* search for it alone."""
+    algorithms = {
+        "external": partial(external_astar_search, memory_limit=EXTERNAL_MEMORY_LIMIT),
+        "pea": partial_expansion_search,
+        "hda": partial(hda_star_search, workers=HDA_WORKERS),
+    }
+
+    for name in PDB_BOARDS + ("test-vis2.csv",):
+        board, target = parse_board(read_board(name))
+        others = sorted(coord for coord, color in board.items() if color == PlayerColor.BLUE and coord != target)
+        targets = [target] + others[:EXTRA_TARGETS]
+        optimal = {coord: astar_search(SearchProblem(board, coord, "pdb")) for coord in targets}
+
+        found = {algorithm: {target: search_algorithm(SearchProblem(board, target, "pdb"))}
+                 for algorithm, search_algorithm in algorithms.items()}
+        found["multi_target"] = multi_target_search([SearchProblem(board, coord, "pdb") for coord in targets])
+
+        for algorithm, nodes in found.items():
+            for coord, node in nodes.items():
+                if optimal[coord] is None:
+                    assert node is None, (name, algorithm, coord, node.solution())
+                else:
+                    assert node is not None and node.path_cost == optimal[coord].path_cost, (name, algorithm, coord)
+                    assert is_solution(board, coord, node.solution()), (name, algorithm, coord)
+
+
+@check
+def check_incremental_edits():
+    """After each of a series of edits, IncrementalSearch finds a solution of the same cost as a fresh A* search of
+    the edited board (or finds none when A* finds none), and the solution is valid. The edits are random, plus some
+    which stop the solution's line clears from happening."""
+    rng = random.Random(SEED)
+    sessions = [(name, random_edit, EDITS) for name in EDIT_BOARDS]
+    sessions += [(name, line_edit, LINE_EDITS) for name in LINE_CLEAR_BOARDS]
+
+    for name, make_edit, edits in sessions:
+        board, target = parse_board(read_board(name))
+        session = IncrementalSearch(board, target, "pdb")
+        sequence = session.solve()
+        for _ in range(edits):
+            session.edit(make_edit(rng, session.initial.to_dict(), target, sequence))
+            sequence = session.solve()
+
+            edited = session.initial.to_dict()
+            fresh = astar_search(SearchProblem(session.initial, target, "pdb"))
+            if fresh is None:
+                assert sequence is None, (name, edited, sequence)
+            else:
+                assert sequence is not None and len(sequence) == fresh.depth, (name, edited, sequence, fresh.depth)
+                assert is_solution(edited, target, sequence), (name, edited, sequence)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.checks",
+                                     description="Check properties the solver relies on.")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"checks to run (default: all of {', '.join(sorted(CHECKS))})")
+    args = parser.parse_args(argv)
+    for name in args.names:
+        if name not in CHECKS:
+            parser.error(f"unknown check {name!r}")
+
+    status = 0
+    for name in args.names or sorted(CHECKS):
+        start = time.perf_counter()
+        try:
+            CHECKS[name]()
+        except AssertionError:
+            traceback.print_exc()
+            print(f"FAIL {name}")
+            status = 1
+        else:
+            print(f"ok   {name} ({time.perf_counter() - start:.1f}s)")
+        sys.stdout.flush()
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Thin client for the solver daemon (see daemon.py). It reads a board from
+stdin and prints the same output as `python -m search`, but the solve happens
+in the already running daemon. For example:
+
+    python -m search.daemon &
+    python -m search.client < test-vis1.csv
+
+The client only imports core.py, so it starts much faster than the solver.
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+from .core import Coord, PlaceAction
+
+SOLUTION_PREFIX = "$SOLUTION"
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "tetress-search.sock")
+
+
+def connect(address: str | int) -> socket.socket:
+    """Connects to a daemon listening on a Unix socket path, or on a localhost port if given a port number."""
+    if isinstance(address, int):
+        return socket.create_connection(("127.0.0.1", address))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def request(address: str | int, board: str, **options) -> dict:
+    """Sends one board (in the usual CSV format) to the daemon and returns its raw JSON response. The options are
+    passed on to `program.search`, e.g. algorithm="ida"."""
+    with connect(address) as sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps({"board": board, **options}).encode() + b"\n")
+        stream.flush()
+        line = stream.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection without answering")
+    return json.loads(line)
+
+
+def solve(address: str | int, board: str, **options) -> list[PlaceAction] | None:
+    """Solves a board with the daemon, returning a list of PlaceActions or None if no solution is possible. Raises
+    ValueError if the daemon could not parse or solve the board, e.g. if no solution was found within a time
+    budget."""
+    response = request(address, board, **options)
+    if "error" in response:
+        raise ValueError(response["error"])
+    if response["solution"] is None:
+        return None
+    return [PlaceAction(*(Coord(r, c) for r, c in piece)) for piece in response["solution"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.client", description="Solve a board with the daemon.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket of the daemon (default: {DEFAULT_SOCKET})")
+    group.add_argument("--port", type=int, help="localhost port of the daemon, instead of a Unix socket")
+    parser.add_argument("-a", "--algorithm", default=None, help="search algorithm to use (default: the daemon's)")
+    args = parser.parse_args(argv)
+
+    options = {"algorithm": args.algorithm} if args.algorithm is not None else {}
+    try:
+        sequence = solve(args.port if args.port is not None else args.socket, sys.stdin.read(), **options)
+    except ValueError as e:
+        # The daemon's own message, e.g. for an invalid board or option, or a time budget which ran out
+        print(f"Error: {e}")
+        return 1
+    except OSError as e:
+        print(f"Could not reach the solver daemon: {e}", file=sys.stderr)
+        return 1
+
+    if sequence is not None:
+        for action in sequence:
+            print(f"{SOLUTION_PREFIX} {action}")
+    else:
+        print(f"{SOLUTION_PREFIX} NOT_FOUND")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
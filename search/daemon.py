@@ -0,0 +1,147 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Resident solver process. It imports the solver and builds its tables once,
+then answers boards sent by the client (see client.py) over a Unix socket or
+a localhost port. For example:
+
+    python -m search.daemon                       # on the default Unix socket
+    python -m search.daemon --port 8765 --solution-cache solutions.db
+
+Each request is one JSON object per line, {"board": "<csv>", ...} with any
+other keys passed on to `program.search` (any of REQUEST_OPTIONS), and is
+answered with one JSON line: {"solution": [[[r, c], ...], ...] or null,
+"stats": {...}} or {"error": "..."}. Unknown keys are an error.
+
+Solutions are kept in a SolutionCache between requests (in memory unless a
+path is given), so boards seen before, up to symmetry, are answered at once.
+Requests are handled one at a time, since each solve uses a whole CPU anyway.
+"""
+
+import argparse
+import json
+import os
+import signal
+import socketserver
+import sys
+import time
+
+from .board_io import parse_board
+from .client import DEFAULT_SOCKET
+from .pattern_database import line_database
+from .program import search, check_options, SearchTimeout
+from .solution_cache import SolutionCache
+from .stats import SearchStats
+
+# Every keyword of program.search which can be sent as JSON
+REQUEST_OPTIONS = ("algorithm", "time_budget", "heuristic", "cache_size", "open_list", "prune", "memory_limit")
+
+
+def handle_request(request: dict, solution_cache: SolutionCache | None = None) -> dict:
+    """Solves one decoded request, returning the response to send back. Every option is checked before the solution
+    cache is consulted, so an invalid request is an error even for a board which has been solved before. Any error
+    while solving is also sent back, rather than dropping the connection."""
+    try:
+        if not isinstance(request, dict) or not isinstance(request.get("board"), str):
+            raise ValueError("The request must be a JSON object with the board as a string")
+        unknown = sorted(key for key in request if key != "board" and key not in REQUEST_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown request options {', '.join(map(repr, unknown))}, expected any of "
+                             f"{', '.join(REQUEST_OPTIONS)}")
+        board, target = parse_board(request["board"])
+        options = {key: request[key] for key in REQUEST_OPTIONS if request.get(key) is not None}
+        check_options(**options)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    stats = SearchStats()
+    start = time.perf_counter()
+    try:
+        sequence = search(board, target, stats=stats, solution_cache=solution_cache, **options)
+    except SearchTimeout:
+        return {"error": "No solution was found within the time budget", "stats": stats.as_dict(),
+                "time": time.perf_counter() - start}
+    except Exception as e:
+        return {"error": f"Could not solve the board: {type(e).__name__}: {e}"}
+    if sequence is not None:
+        solution = [[[coord.r, coord.c] for coord in (action.c1, action.c2, action.c3, action.c4)]
+                    for action in sequence]
+    else:
+        solution = None
+    return {"solution": solution, "stats": stats.as_dict(), "time": time.perf_counter() - start}
+
+
+class SolverHandler(socketserver.StreamRequestHandler):
+    """Answers every request line sent on a connection, until the client closes it."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"error": f"Invalid request: {e}"}
+            else:
+                response = handle_request(request, self.server.solution_cache)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class UnixSolverServer(socketserver.UnixStreamServer):
+    def __init__(self, path, solution_cache):
+        # A socket file left behind by a daemon which did not shut down cleanly would stop us from binding
+        if os.path.exists(path):
+            os.unlink(path)
+        self.solution_cache = solution_cache
+        super().__init__(path, SolverHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+class TCPSolverServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+    def __init__(self, port, solution_cache):
+        self.solution_cache = solution_cache
+        super().__init__(("127.0.0.1", port), SolverHandler)
+
+
+def make_server(address: str | int, solution_cache: SolutionCache | None = None) -> socketserver.BaseServer:
+    """Creates a server on a Unix socket path, or on a localhost port if given a port number."""
+    if isinstance(address, int):
+        return TCPSolverServer(address, solution_cache)
+    return UnixSolverServer(address, solution_cache)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.daemon", description="Run a resident solver process.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket to listen on (default: {DEFAULT_SOCKET})")
+    group.add_argument("--port", type=int, help="localhost port to listen on, instead of a Unix socket")
+    parser.add_argument("--solution-cache", metavar="PATH", default=":memory:",
+                        help="persistent cache of solutions (default: kept in memory while the daemon runs)")
+    args = parser.parse_args(argv)
+
+    # Open the pattern database now rather than during the first request that needs it
+    line_database()
+    solution_cache = SolutionCache(args.solution_cache)
+
+    # Shut down cleanly (removing the socket file) when stopped with kill as well as with Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with make_server(args.port if args.port is not None else args.socket, solution_cache) as server:
+        print(f"Listening on {server.server_address}", file=sys.stderr, flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            solution_cache.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
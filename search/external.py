@@ -0,0 +1,255 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import os
+import struct
+import tempfile
+from itertools import islice
+
+from .core import PlaceAction
+from .bitboard import BitBoard, CELL_COUNT, coords_mask, mask_coords
+from .play_algorithms import SearchNode
+
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+
+# Approximate bytes of RAM taken by one open list entry and one transposition table entry, as measured with
+# tracemalloc. Used to turn the memory limit into a number of entries.
+OPEN_ENTRY_BYTES = 100
+TABLE_ENTRY_BYTES = 130
+
+MASK_BYTES = (CELL_COUNT + 7) // 8
+
+# An open list entry: path cost, node id, Zobrist key, occupied mask, red mask
+ENTRY = struct.Struct(f"<IQQ{MASK_BYTES}s{MASK_BYTES}s")
+
+# A back-pointer record, stored at offset node id * size: parent node id (-1 for the root) and the placement mask
+BACK_POINTER = struct.Struct(f"<q{MASK_BYTES}s")
+
+# Number of entries read back from a bucket file at a time
+READ_CHUNK = 65536
+
+
+def _pack_mask(mask: int) -> bytes:
+    return mask.to_bytes(MASK_BYTES, "little")
+
+
+def _unpack_mask(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+class _Bucket:
+    """Entries with the same f-value and heuristic value. Entries are held in memory as packed records, and spilled
+    to the end of the bucket's file when memory runs short."""
+
+    __slots__ = ("entries", "file", "spilled", "read")
+
+    def __init__(self):
+        self.entries = []
+        self.file = None
+        self.spilled = 0
+        self.read = 0
+
+    def __len__(self):
+        return len(self.entries) + self.spilled - self.read
+
+
+class SpillingOpenList:
+    """Open list of packed records, bucketed by (f-value, heuristic value) like BucketOpenList. At most `max_entries`
+    records are kept in memory; beyond that, the buckets with the highest f-values (which will be popped last) are
+    written to files in `directory`, and read back a chunk at a time once they become the lowest buckets."""
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.buckets = {}
+        self.in_memory = 0
+        self.size = 0
+        self.spills = 0
+
+    def push(self, priority, heuristic, item):
+        """Add a packed record to the open list with the given f-value and heuristic value."""
+        bucket = self.buckets.get((priority, heuristic))
+        if bucket is None:
+            bucket = self.buckets[(priority, heuristic)] = _Bucket()
+        bucket.entries.append(item)
+        self.in_memory += 1
+        self.size += 1
+        if self.in_memory > self.max_entries:
+            self.spill()
+
+    def pop(self):
+        """Remove and return the (priority, heuristic, item) entry with the lowest priority."""
+        key = min(self.buckets)
+        bucket = self.buckets[key]
+        if not bucket.entries:
+            self.load(bucket)
+
+        item = bucket.entries.pop()
+        self.in_memory -= 1
+        self.size -= 1
+        if not len(bucket):
+            if bucket.file is not None:
+                bucket.file.close()
+            del self.buckets[key]
+        return key[0], key[1], item
+
+    def spill(self):
+        """Write out the coldest buckets until only half of the allowed entries are left in memory. The lowest bucket
+        is never spilled, since it is about to be popped."""
+        lowest = min(self.buckets)
+        for key in sorted(self.buckets, reverse=True):
+            if self.in_memory <= self.max_entries // 2 or key == lowest:
+                break
+            bucket = self.buckets[key]
+            if not bucket.entries:
+                continue
+            if bucket.file is None:
+                bucket.file = tempfile.TemporaryFile(dir=self.directory)
+            bucket.file.seek(0, os.SEEK_END)
+            bucket.file.write(b"".join(bucket.entries))
+            bucket.spilled += len(bucket.entries)
+            self.in_memory -= len(bucket.entries)
+            bucket.entries = []
+            self.spills += 1
+
+    def load(self, bucket):
+        """Read the next chunk of a bucket's spilled entries back into memory."""
+        count = min(READ_CHUNK, bucket.spilled - bucket.read)
+        bucket.file.seek(bucket.read * ENTRY.size)
+        data = bucket.file.read(count * ENTRY.size)
+        bucket.entries = [data[i:i + ENTRY.size] for i in range(0, len(data), ENTRY.size)]
+        bucket.read += count
+        self.in_memory += count
+
+        if bucket.read == bucket.spilled:
+            # Everything has been read back, so the file can be reused for later spills from the start
+            bucket.file.seek(0)
+            bucket.file.truncate()
+            bucket.spilled = bucket.read = 0
+
+    def close(self):
+        for bucket in self.buckets.values():
+            if bucket.file is not None:
+                bucket.file.close()
+        self.buckets = {}
+
+    def __len__(self):
+        return self.size
+
+
+class BackPointerFile:
+    """Append-only file of (parent, placement) records, one per queued node, so that no node has to stay in memory
+    just to be able to rebuild the solution."""
+
+    def __init__(self, directory):
+        self.file = tempfile.TemporaryFile(dir=directory)
+        self.count = 0
+
+    def append(self, parent: int, mask: int) -> int:
+        """Records a node, returning its id."""
+        self.file.write(BACK_POINTER.pack(parent, _pack_mask(mask)))
+        self.count += 1
+        return self.count - 1
+
+    def placements(self, node_id: int) -> list[int]:
+        """Follows the back-pointers from a node to the root, returning the placement masks in order from the root."""
+        self.file.flush()
+        masks = []
+        while node_id > 0:
+            self.file.seek(node_id * BACK_POINTER.size)
+            node_id, mask = BACK_POINTER.unpack(self.file.read(BACK_POINTER.size))
+            masks.append(_unpack_mask(mask))
+        return masks[::-1]
+
+    def close(self):
+        self.file.close()
+
+
+def _trim_table(table, max_entries):
+    """Forgets the oldest half of the transposition table. The oldest boards were found first and are mostly
+    expanded already, so forgetting them costs at most some repeated work, never optimality."""
+    for key in list(islice(table, max_entries // 2)):
+        del table[key]
+
+
+def external_astar_search(problem, stats=None, memory_limit=DEFAULT_MEMORY_LIMIT, directory=None):
+    """Runs A* search on the problem within a memory limit (in bytes), spilling to disk rather than running out of
+    memory. Nodes only exist as packed records: open list entries hold the board, path cost and node id, and every
+    queued node's parent and placement go to a back-pointer file, from which the solution is rebuilt at the end.
+
+    Half of the limit goes to the open list, which spills its coldest f-buckets to files in `directory` (the system
+    temporary directory by default). The other half goes to the transposition table, which forgets its oldest boards
+    when full. A forgotten board may be expanded again, which only costs time: the solution stays optimal."""
+    max_open = max(memory_limit // 2 // OPEN_ENTRY_BYTES, 1)
+    max_table = max(memory_limit // 2 // TABLE_ENTRY_BYTES, 2)
+    nodes_expanded = nodes_generated = nodes_deduplicated = max_frontier = 0
+
+    queue = SpillingOpenList(directory, max_open)
+    back_pointers = BackPointerFile(directory)
+
+    initial = problem.initial
+    root = back_pointers.append(-1, 0)
+    heuristic = problem.heuristic(initial)
+    queue.push(heuristic, heuristic, ENTRY.pack(0, root, initial.key, _pack_mask(initial.occupied),
+                                                _pack_mask(initial.red)))
+
+    # The table is keyed by the packed masks of each board, which is exact and much smaller than a BitBoard
+    table = {_pack_mask(initial.occupied) + _pack_mask(initial.red): 0}
+    goal = None
+
+    try:
+        while queue:
+            priority, heuristic, item = queue.pop()
+            g, node_id, key, occupied, red = ENTRY.unpack(item)
+
+            # Skip stale entries for boards which have since been reached more cheaply
+            best_cost = table.get(occupied + red)
+            if best_cost is not None and g > best_cost:
+                continue
+
+            state = BitBoard(_unpack_mask(occupied), _unpack_mask(red), key)
+            if heuristic == 0 and problem.goal_test(state):
+                goal = node_id
+                break
+
+            nodes_expanded += 1
+            child_cost = problem.path_cost(g)
+            for action in problem.actions(state):
+                nodes_generated += 1
+                child = problem.result(state, action)
+                child_occupied = _pack_mask(child.occupied)
+                child_red = _pack_mask(child.red)
+
+                best_cost = table.get(child_occupied + child_red)
+                if best_cost is not None and child_cost >= best_cost:
+                    nodes_deduplicated += 1
+                    continue
+                if len(table) >= max_table:
+                    _trim_table(table, max_table)
+                table[child_occupied + child_red] = child_cost
+
+                child_id = back_pointers.append(node_id, coords_mask((action.c1, action.c2, action.c3, action.c4)))
+                child_heuristic = problem.heuristic(child)
+                queue.push(child_cost + child_heuristic, child_heuristic,
+                           ENTRY.pack(child_cost, child_id, child.key, child_occupied, child_red))
+
+            if len(queue) > max_frontier:
+                max_frontier = len(queue)
+
+        if goal is None:
+            return None
+
+        # Rebuild the solution as a chain of search nodes, just like the other search algorithms return
+        node = SearchNode(problem.initial)
+        for mask in back_pointers.placements(goal):
+            node = node.child_node(PlaceAction(*mask_coords(mask)), problem)
+        return node
+
+    finally:
+        queue.close()
+        back_pointers.close()
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+            stats.nodes_deduplicated += nodes_deduplicated
+            stats.max_frontier = max(stats.max_frontier, max_frontier)
@@ -0,0 +1,309 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Incremental search for boards which are edited a cell or two at a time, in the
+style of Lifelong Planning A* (LPA*). An IncrementalSearch session keeps its
+search graph, with the g and rhs values of every board in it, between queries,
+so after an edit only the part of the search which the edit affects is done
+again. For example:
+
+    session = IncrementalSearch(board, target)
+    session.solve()
+    session.edit({Coord(2, 3): PlayerColor.BLUE, Coord(5, 5): None})
+    session.solve()
+
+Boards in the graph are identified by the cells in which they differ from the
+initial board. Editing the initial board therefore leaves a board's identity
+unchanged unless the edited cells were placed on or cleared on the way to it.
+Edges are only worked out again where the edit can change them.
+"""
+
+import heapq
+from itertools import count
+
+from .core import Coord, PlayerColor, PlaceAction, BOARD_N
+from .bitboard import BitBoard, CELL_COUNT, COL_MASKS, FULL_MASK, LINE_MASKS, ROW_MASKS, ZOBRIST_BLUE, ZOBRIST_RED, zobrist
+from .helpers import PIECE_SIZE
+from .placement_algorithms import (find_all_placements, PLACEMENT_ACTIONS, PLACEMENT_MASKS, PLACEMENT_NEIGHBOURS,
+                                   PLACEMENTS_BY_CELL)
+from .play_algorithms import SearchProblem, PATH_COST
+
+INFINITY = float("inf")
+
+# The vertex every goal board leads to, at no cost. Board vertices are never negative.
+GOAL = -1
+
+# The root is the initial board, which does not differ from itself
+ROOT = 0
+
+
+class IncrementalSearch:
+    """A search session for one target on a board which is edited between queries.
+
+    Every board in the graph has a g-value (its cost when it was last expanded) and an rhs-value (the cheapest cost
+    through its predecessors), and a board whose two values differ is queued. solve() runs the LPA* main loop until
+    the goal is settled, and edit() changes the initial board and requeues only the boards whose edges changed.
+
+    Queue keys are (f-value, heuristic value), breaking ties towards boards closer to the goal like the open lists
+    used by astar_search, rather than LPA*'s usual (f-value, g-value). Boards which differ only in the order of
+    their placements tie on f-value very often, so this tie-break makes a big difference here. Underconsistent
+    boards, whose g-value is out of date, still go ahead of every tie."""
+
+    def __init__(self, board: dict[Coord, PlayerColor] | BitBoard, target: Coord, heuristic: str = "gaps"):
+        self.problem = SearchProblem(board, target, heuristic)
+        self.initial = self.problem.initial
+        self.g = {}
+        self.rhs = {ROOT: 0}
+        self.h = {}
+        # Edges out of each expanded board, as a dictionary mapping each placement to the board it leads to
+        self.succs = {}
+        # Edges into each board, as a dictionary mapping each predecessor to the placements leading from it
+        self.preds = {}
+        self.queue = []
+        self.queued = {}
+        self.counter = count()
+        self.push(ROOT)
+
+    def vertex(self, board: BitBoard) -> int:
+        """The vertex of a board: the cells in which its blue and red masks differ from the initial board's."""
+        return (board.blue ^ self.initial.blue) | (board.red ^ self.initial.red) << CELL_COUNT
+
+    def board(self, vertex: int) -> BitBoard:
+        """The board of a vertex. The Zobrist key is the initial board's, updated for the cells which differ."""
+        blue = vertex & FULL_MASK
+        red = vertex >> CELL_COUNT
+        key = self.initial.key ^ zobrist(blue, ZOBRIST_BLUE) ^ zobrist(red, ZOBRIST_RED)
+        return BitBoard._from_masks(self.initial.blue ^ blue, self.initial.red ^ red, key)
+
+    def heuristic(self, vertex: int) -> int:
+        if vertex == GOAL:
+            return 0
+        h = self.h.get(vertex)
+        if h is None:
+            h = self.h[vertex] = self.problem.heuristic(self.board(vertex))
+        return h
+
+    def key(self, vertex: int) -> tuple:
+        g = self.g.get(vertex, INFINITY)
+        rhs = self.rhs.get(vertex, INFINITY)
+        h = self.heuristic(vertex)
+        if g < rhs:
+            # Underconsistent vertices go ahead of every tie, so their stale g-values are never left behind
+            return g + h, -1
+        return rhs + h, h
+
+    def push(self, vertex: int):
+        key = self.key(vertex)
+        self.queued[vertex] = key
+        heapq.heappush(self.queue, (*key, next(self.counter), vertex))
+
+    def update(self, vertex: int):
+        """Recomputes a vertex's rhs-value from its predecessors, and queues it if it is now inconsistent."""
+        if vertex != ROOT:
+            preds = self.preds.get(vertex)
+            best = min(self.g.get(pred, INFINITY) for pred in preds) if preds else INFINITY
+            self.rhs[vertex] = best + (0 if vertex == GOAL else PATH_COST)
+        if self.g.get(vertex, INFINITY) != self.rhs.get(vertex, INFINITY):
+            self.push(vertex)
+        else:
+            self.queued.pop(vertex, None)
+
+    def set_edge(self, vertex: int, placement: int | None, child: int | None) -> list[int]:
+        """Points the edge for a placement out of a vertex at a new child, or removes it for None. Returns the
+        vertices whose predecessors changed."""
+        edges = self.succs[vertex]
+        old_child = edges.get(placement)
+        if old_child == child:
+            return []
+        changed = []
+        if old_child is not None:
+            placements = self.preds[old_child][vertex]
+            placements.remove(placement)
+            if not placements:
+                del self.preds[old_child][vertex]
+            changed.append(old_child)
+        if child is None:
+            del edges[placement]
+        else:
+            edges[placement] = child
+            self.preds.setdefault(child, {}).setdefault(vertex, []).append(placement)
+            changed.append(child)
+        return changed
+
+    def expand(self, vertex: int) -> int:
+        """Generates a vertex's edges: to the goal if its board is a goal, otherwise to the result of every
+        placement. Returns the number of children."""
+        board = self.board(vertex)
+        self.succs[vertex] = {}
+        if self.problem.goal_test(board):
+            self.set_edge(vertex, None, GOAL)
+            return 0
+        placements = find_all_placements(board)
+        for placement in placements:
+            child_board = self.problem.result(board, PLACEMENT_ACTIONS[placement])
+            child = self.vertex(child_board)
+            if child not in self.h:
+                # Worked out from the child's board while we have it, rather than rebuilding the board from the vertex
+                self.h[child] = self.problem.heuristic(child_board)
+            self.set_edge(vertex, placement, child)
+        return len(placements)
+
+    def solve(self, stats=None) -> list[PlaceAction] | None:
+        """Repairs the search after any edits, and returns the solution for the current board (or None if no
+        solution is possible)."""
+        nodes_expanded = nodes_generated = max_frontier = 0
+        g, rhs, queue, queued = self.g, self.rhs, self.queue, self.queued
+
+        try:
+            while queue:
+                priority, tie, _, vertex = queue[0]
+                if queued.get(vertex) != (priority, tie):
+                    # Stale entry for a vertex which has since been requeued or become consistent
+                    heapq.heappop(queue)
+                    continue
+                if (priority, tie) >= self.key(GOAL) and rhs.get(GOAL, INFINITY) == g.get(GOAL, INFINITY):
+                    break
+
+                heapq.heappop(queue)
+                del queued[vertex]
+                if (priority, tie) < self.key(vertex):
+                    # The heuristic has gone up since the vertex was queued
+                    self.push(vertex)
+                    continue
+
+                if g.get(vertex, INFINITY) > rhs[vertex]:
+                    g[vertex] = rhs[vertex]
+                    if vertex != GOAL and vertex not in self.succs:
+                        nodes_expanded += 1
+                        nodes_generated += self.expand(vertex)
+                else:
+                    g[vertex] = INFINITY
+                    self.update(vertex)
+                for child in self.succs.get(vertex, {}).values():
+                    self.update(child)
+
+                if len(queued) > max_frontier:
+                    max_frontier = len(queued)
+
+            return self.solution()
+
+        finally:
+            if stats is not None:
+                stats.nodes_expanded += nodes_expanded
+                stats.nodes_generated += nodes_generated
+                stats.max_frontier = max(stats.max_frontier, max_frontier)
+
+    def solution(self) -> list[PlaceAction] | None:
+        """Follows the cheapest predecessors back from the goal to the initial board."""
+        if self.g.get(GOAL, INFINITY) == INFINITY:
+            return None
+
+        def cost(item):
+            # Vertices which are still inconsistent (queued behind the goal) may have stale g-values
+            pred = item[0]
+            g = self.g.get(pred, INFINITY)
+            return g if g == self.rhs.get(pred) else INFINITY
+
+        vertex = GOAL
+        actions = []
+        while vertex != ROOT:
+            pred, placements = min(self.preds[vertex].items(), key=cost)
+            if vertex != GOAL:
+                actions.append(PLACEMENT_ACTIONS[placements[0]])
+            vertex = pred
+        return actions[::-1]
+
+    def edit(self, changes: dict[Coord, PlayerColor | None]):
+        """Changes cells of the initial board, to the given colour or to empty for None, and repairs the search graph
+        for the next solve().
+
+        A board which never placed on or cleared an edited cell keeps its vertex. Boards which did are dropped, and
+        are reached (and expanded) again from scratch if they are still reachable. An expanded board's edges are only
+        worked out again for placements which cover an edited cell, or which fill a line holding an edited cell, so the
+        work done depends on how much of the search the edit can reach.
+
+        Some edits start the search again instead, as repairing the graph would cost more than a fresh search. Edits
+        to the target's own row or column change which boards are goals. Adding or removing a red square changes which
+        placements are allowed next to it on every board, and can lower the heuristic of every board, so every key in
+        the queue would have to be worked out again. So can edits to the lines next to the target's with the pattern
+        database heuristic, which reads them. Lastly, an edit which drops more than half of the expanded boards
+        leaves little worth keeping."""
+        board = self.initial.to_dict()
+        for coord, color in changes.items():
+            if color is None:
+                board.pop(coord, None)
+            else:
+                board[coord] = color
+        if board.get(self.problem.target) != PlayerColor.BLUE:
+            raise ValueError("The target must stay blue")
+
+        old_initial = self.initial
+        problem = SearchProblem(board, self.problem.target, self.problem.heuristic_name)
+        edited = (old_initial.blue ^ problem.initial.blue) | (old_initial.red ^ problem.initial.red)
+        if not edited:
+            return
+        target = problem.target
+        heuristic_lines = (ROW_MASKS[(target.r - 1) % BOARD_N] | ROW_MASKS[(target.r + 1) % BOARD_N] |
+                           COL_MASKS[(target.c - 1) % BOARD_N] | COL_MASKS[(target.c + 1) % BOARD_N])
+        edited_bits = edited | edited << CELL_COUNT
+        # Every vertex whose cells differ from the initial board on an edited cell now stands for a different board
+        dropped = [vertex for vertex in self.rhs if vertex != GOAL and vertex & edited_bits]
+        if (edited & (problem.target_row | problem.target_col) or old_initial.red != problem.initial.red
+                or (problem.heuristic_name == "pdb" and edited & heuristic_lines)
+                or 2 * sum(vertex in self.succs for vertex in dropped) > len(self.succs)):
+            self.__init__(problem.initial, problem.target, problem.heuristic_name)
+            return
+
+        self.problem = problem
+        self.initial = problem.initial
+        changed = set()
+
+        for vertex in dropped:
+            for placement, child in list(self.succs.get(vertex, {}).items()):
+                changed.update(self.set_edge(vertex, placement, child=None))
+            for pred, placements in list(self.preds.get(vertex, {}).items()):
+                for placement in list(placements):
+                    changed.update(self.set_edge(pred, placement, child=None))
+            for table in (self.g, self.rhs, self.h, self.succs, self.preds, self.queued):
+                table.pop(vertex, None)
+        changed = {vertex for vertex in changed if vertex == GOAL or not vertex & edited_bits}
+
+        # Placements whose legality the edit may have changed: those covering an edited cell. Also the lines whose
+        # fullness it may have changed.
+        candidates = [placement for placement, mask in enumerate(PLACEMENT_MASKS) if mask & edited]
+        lines = [line for line in LINE_MASKS if line & edited]
+        blue, red = self.initial.blue, self.initial.red
+
+        for vertex, edges in self.succs.items():
+            if GOAL in edges.values():
+                continue
+            # Only the masks are needed to find the placements to recheck, so the board (and its Zobrist key) is only
+            # built for the placements which are allowed
+            vertex_red = red ^ vertex >> CELL_COUNT
+            occupied = blue ^ vertex & FULL_MASK | vertex_red
+            board = None
+            recheck = set(candidates)
+            for line in lines:
+                # Whether a placement fills a line holding an edited cell now depends on the edited cells, so recheck
+                # every placement which covers the rest of the line's empty squares
+                empty = line & ~edited & ~occupied
+                if not empty:
+                    recheck.update(placement for placement in edges if PLACEMENT_MASKS[placement] & line)
+                elif empty.bit_count() <= PIECE_SIZE:
+                    recheck.update(placement for placement in PLACEMENTS_BY_CELL[(empty & -empty).bit_length() - 1]
+                                   if PLACEMENT_MASKS[placement] & empty == empty)
+
+            for placement in recheck:
+                mask = PLACEMENT_MASKS[placement]
+                if not mask & occupied and PLACEMENT_NEIGHBOURS[mask] & vertex_red:
+                    if board is None:
+                        board = self.board(vertex)
+                    child = self.vertex(problem.result(board, PLACEMENT_ACTIONS[placement]))
+                else:
+                    child = None
+                if child is not None or placement in edges:
+                    changed.update(self.set_edge(vertex, placement, child))
+
+        for vertex in changed:
+            self.update(vertex)
@@ -0,0 +1,81 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import heapq
+from itertools import count
+
+
+class HeapOpenList:
+    """Open list for A* search backed by a binary heap. Entries are ordered by f-value, then by heuristic value so that
+    nodes closer to the goal are preferred, then by insertion order."""
+
+    def __init__(self):
+        self.heap = []
+        self.counter = count()
+
+    def push(self, priority, heuristic, item):
+        """Add an item to the open list with the given f-value and heuristic value."""
+        heapq.heappush(self.heap, (priority, heuristic, next(self.counter), item))
+
+    def pop(self):
+        """Remove and return the (priority, heuristic, item) entry with the lowest priority."""
+        priority, heuristic, _, item = heapq.heappop(self.heap)
+        return priority, heuristic, item
+
+    def __len__(self):
+        return len(self.heap)
+
+
+class BucketOpenList:
+    """Open list for A* search which stores items in buckets indexed by f-value and then by heuristic value. Path costs
+    and heuristic values are small integers, so there are only ever a handful of buckets and finding the lowest one is
+    cheap. Items within a bucket are popped in last in, first out order."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.min_priority = None
+        self.size = 0
+
+    def push(self, priority, heuristic, item):
+        """Add an item to the open list with the given f-value and heuristic value."""
+        bucket = self.buckets.get(priority)
+        if bucket is None:
+            bucket = self.buckets[priority] = {}
+        items = bucket.get(heuristic)
+        if items is None:
+            items = bucket[heuristic] = []
+        items.append(item)
+
+        if self.min_priority is None or priority < self.min_priority:
+            self.min_priority = priority
+        self.size += 1
+
+    def pop(self):
+        """Remove and return the (priority, heuristic, item) entry with the lowest priority."""
+        if not self.size:
+            raise IndexError("pop from an empty open list")
+
+        priority = self.min_priority
+        bucket = self.buckets[priority]
+        heuristic = min(bucket)
+        items = bucket[heuristic]
+        item = items.pop()
+
+        # Remove any buckets we have emptied and move on to the next lowest priority
+        if not items:
+            del bucket[heuristic]
+            if not bucket:
+                del self.buckets[priority]
+                self.min_priority = min(self.buckets) if self.buckets else None
+        self.size -= 1
+
+        return priority, heuristic, item
+
+    def __len__(self):
+        return self.size
+
+
+OPEN_LISTS = {
+    "heap": HeapOpenList,
+    "bucket": BucketOpenList,
+}
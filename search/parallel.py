@@ -0,0 +1,247 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import multiprocessing
+import os
+import queue
+import time
+
+from .core import PlaceAction
+from .bitboard import BitBoard, coords_mask, mask_coords
+from .open_lists import HeapOpenList
+from .play_algorithms import SearchNode, SearchProblem
+
+NO_SOLUTION = 2 ** 31 - 1
+BATCH_SIZE = 64
+IDLE_WAIT = 0.02
+
+
+def _owner(key, workers):
+    """The worker responsible for a board, chosen by its Zobrist hash."""
+    return key % workers
+
+
+def _worker(index, workers, occupied, red, target, heuristic, inboxes, reports, incumbent, stop):
+    """Main loop of one HDA* worker. The worker owns every board whose hash maps to it, and keeps the open list and
+    transposition table for those boards only. Children owned by other workers are sent to them in batches.
+
+    Inbox messages are ("children", batch) or ("trace", record). Children are (g, occupied, red, key, parent), where
+    parent is a back-pointer (owner, record, mask): the worker which expanded the parent board, the parent's record
+    there, and the placement mask leading from it (None for the root). Each worker keeps the back-pointer of every
+    board it expands or finds to be a goal in its records, and answers a trace request with one of them, so that
+    the coordinator can follow the solution back to the root once the search is over."""
+    problem = SearchProblem(BitBoard(occupied, red), target, heuristic)
+    inbox = inboxes[index]
+    open_list = HeapOpenList()
+    best_costs = {}
+    records = []
+    outboxes = [[] for _ in range(workers)]
+    sent = received = nodes_expanded = nodes_generated = 0
+    reported = None
+
+    def insert(g, state, parent):
+        best_cost = best_costs.get(state)
+        if best_cost is not None and g >= best_cost:
+            return
+        heuristic_value = problem.heuristic(state)
+        if g + heuristic_value >= incumbent.value:
+            return
+        best_costs[state] = g
+        open_list.push(g + heuristic_value, heuristic_value, (g, state, parent))
+
+    def flush():
+        nonlocal sent
+        for owner, batch in enumerate(outboxes):
+            if batch:
+                inboxes[owner].put(("children", batch))
+                sent += len(batch)
+                outboxes[owner] = []
+
+    def receive(message):
+        nonlocal received
+        kind, payload = message
+        if kind == "trace":
+            reports.put(("trace", records[payload]))
+            return
+        received += len(payload)
+        for g, child_occupied, child_red, key, parent in payload:
+            insert(g, BitBoard(child_occupied, child_red, key), parent)
+
+    while not stop.is_set():
+        # Take in every batch of children that other workers have sent us
+        try:
+            while True:
+                receive(inbox.get_nowait())
+        except queue.Empty:
+            pass
+
+        # Skip over entries which have been superseded or can no longer beat the best solution
+        while open_list:
+            priority, heuristic_value, (g, state, parent) = open_list.pop()
+            if g <= best_costs[state] and priority < incumbent.value:
+                break
+        else:
+            # Nothing left to do until more children arrive. Tell the coordinator, so it can detect termination.
+            flush()
+            status = (index, sent, received)
+            if status != reported:
+                reports.put(("idle", *status))
+                reported = status
+            try:
+                receive(inbox.get(timeout=IDLE_WAIT))
+            except queue.Empty:
+                pass
+            continue
+
+        # We have work to do again, so the coordinator must not count us as idle
+        if reported is not None:
+            reports.put(("busy", index))
+            reported = None
+
+        # Only check if it is a goal state if the value of the heuristic function is 0
+        if heuristic_value == 0 and problem.goal_test(state):
+            with incumbent.get_lock():
+                if g < incumbent.value:
+                    incumbent.value = g
+                    records.append(parent)
+                    reports.put(("goal", g, (index, len(records) - 1)))
+            continue
+
+        nodes_expanded += 1
+        records.append(parent)
+        record = len(records) - 1
+        for action in problem.actions(state):
+            nodes_generated += 1
+            child = problem.result(state, action)
+            child_parent = (index, record, coords_mask(action.coords))
+            child_g = problem.path_cost(g)
+            owner = _owner(child.key, workers)
+            if owner == index:
+                insert(child_g, child, child_parent)
+            else:
+                outboxes[owner].append((child_g, child.occupied, child.red, child.key, child_parent))
+                if len(outboxes[owner]) >= BATCH_SIZE:
+                    inboxes[owner].put(("children", outboxes[owner]))
+                    sent += len(outboxes[owner])
+                    outboxes[owner] = []
+
+    reports.put(("stats", nodes_expanded, nodes_generated))
+
+
+def _report(reports, processes):
+    """Waits for the next report from the workers, or returns None after a quiet moment. Every worker runs until the
+    coordinator stops it, so one which has exited has crashed, and RuntimeError is raised rather than waiting for it
+    forever."""
+    try:
+        return reports.get(timeout=IDLE_WAIT)
+    except queue.Empty:
+        for index, process in enumerate(processes):
+            if not process.is_alive():
+                raise RuntimeError(f"HDA* worker {index} exited with code {process.exitcode}")
+        return None
+
+
+def hda_star_search(problem, stats=None, workers=None):
+    """Runs hash distributed A* (HDA*) on the problem across several worker processes. Every board is owned by one
+    worker, chosen by its Zobrist hash, which runs A* on the boards it owns and sends children owned by other workers
+    to them in batches.
+
+    Workers share the cost of the best solution found so far and ignore anything which cannot beat it. The search
+    ends once every worker is idle and every child that was sent has been received, which is checked twice in a row
+    with the same counts so that nothing can be in flight. At that point no open board can lead to a cheaper
+    solution, so (with an admissible heuristic) the best solution found is optimal. The solution is then read off by
+    following its back-pointers from worker to worker. Raises RuntimeError if a worker crashes."""
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    inboxes = [context.Queue() for _ in range(workers)]
+    reports = context.Queue()
+    incumbent = context.Value("i", NO_SOLUTION)
+    stop = context.Event()
+
+    initial = problem.initial
+    processes = [
+        context.Process(target=_worker, daemon=True, args=(
+            index, workers, initial.occupied, initial.red, problem.target, problem.heuristic_name,
+            inboxes, reports, incumbent, stop))
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # The root is "sent" by the coordinator, so it is counted like any other child
+    inboxes[_owner(initial.key, workers)].put(("children", [(0, initial.occupied, initial.red, initial.key, None)]))
+    idle = {}
+    previous = None
+    best = None
+    masks = []
+
+    try:
+        while True:
+            message = _report(reports, processes)
+            if message is not None:
+                if message[0] == "goal":
+                    best = min(best, message[1:]) if best is not None else message[1:]
+                elif message[0] == "busy":
+                    idle.pop(message[1], None)
+                else:
+                    _, index, sent, received = message
+                    idle[index] = (sent, received)
+                # Any report means the workers are still changing, so wait for a quiet moment
+                continue
+
+            # Check whether every worker is idle and every child that was sent has been received
+            snapshot = tuple(idle.get(index) for index in range(workers))
+            if None not in snapshot and 1 + sum(s for s, _ in snapshot) == sum(r for _, r in snapshot):
+                if snapshot == previous:
+                    break
+                previous = snapshot
+            else:
+                previous = None
+
+        # Follow the back-pointers of the best goal to the root, asking the worker holding each record for it
+        reference = best[1] if best is not None else None
+        while reference is not None:
+            owner, record = reference
+            inboxes[owner].put(("trace", record))
+            message = None
+            while message is None or message[0] != "trace":
+                message = _report(reports, processes)
+            parent = message[1]
+            if parent is None:
+                break
+            reference = parent[:2]
+            masks.append(parent[2])
+
+    finally:
+        stop.set()
+        nodes_expanded = nodes_generated = finished = 0
+        deadline = time.monotonic() + 5
+        while finished < workers and time.monotonic() < deadline:
+            try:
+                message = reports.get(timeout=IDLE_WAIT)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            if message[0] == "stats":
+                nodes_expanded += message[1]
+                nodes_generated += message[2]
+                finished += 1
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+
+    if best is None:
+        return None
+
+    # Rebuild the solution as a chain of search nodes, just like the other search algorithms return
+    node = SearchNode(problem.initial)
+    for mask in reversed(masks):
+        action = PlaceAction(*mask_coords(mask))
+        node = node.child_node(action, problem)
+    return node
@@ -0,0 +1,136 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Pattern database holding the minimum number of tetrominoes needed to complete
+a line. Build (or rebuild) the database file with:
+
+    python -m search.pattern_database
+
+Every piece which overlaps a line covers a single run of 1 to 4 adjacent cells
+of that line, inside one gap between occupied cells. A run of fewer than 4
+cells is only possible if the rest of the piece can stick out sideways, i.e.
+if at least one cell of the run has an empty cell on one side of the line. We
+call an empty cell with occupied cells on both sides "blocked".
+
+A line pattern lists, for each of the BOARD_N - 1 cells after the target,
+whether it is occupied, empty or blocked. The database stores the minimum
+number of runs needed to cover every empty cell in each pattern, with 255
+meaning it cannot be done. Patterns are numbered in base 3 (0 = occupied,
+1 = empty, 2 = blocked, least significant digit first), so the file is just
+one byte per pattern after a short header.
+"""
+
+import mmap
+import sys
+from pathlib import Path
+
+from .core import BOARD_N
+from .helpers import PIECE_SIZE
+
+DATABASE_PATH = Path(__file__).with_name("line_pdb.bin")
+MAGIC = b"LPDB"
+VERSION = 1
+HEADER = MAGIC + bytes((VERSION, BOARD_N))
+UNREACHABLE = 255
+
+PATTERN_CELLS = BOARD_N - 1
+PATTERN_COUNT = 3 ** PATTERN_CELLS
+
+OCCUPIED, EMPTY, BLOCKED = range(3)
+
+# Base 3 value of each set of cells, indexed by a bitmask of the cells (bit k - 1 for the cell k steps from the
+# target). A pattern's index is the value of its empty cells (blocked ones included) plus the value of its blocked
+# cells, since a blocked cell is the digit 2.
+DIGIT_VALUES = tuple(sum(3 ** k for k in range(PATTERN_CELLS) if bits >> k & 1) for bits in range(1 << PATTERN_CELLS))
+
+
+def gap_pieces(gap) -> int:
+    """Finds the fewest runs which cover a gap, given as a sequence of EMPTY/BLOCKED cells."""
+    best = [0] + [UNREACHABLE] * len(gap)
+
+    for end in range(1, len(gap) + 1):
+        for length in range(1, min(PIECE_SIZE, end) + 1):
+            start = end - length
+            # A short run needs a cell with room for the rest of the piece to stick out
+            if length < PIECE_SIZE and all(cell == BLOCKED for cell in gap[start:end]):
+                continue
+            if best[start] + 1 < best[end]:
+                best[end] = best[start] + 1
+
+    return best[-1]
+
+
+def pattern_pieces(pattern) -> int:
+    """Finds the fewest runs which cover every empty cell of a line pattern. Runs cannot cross occupied cells, so
+    each gap can be covered separately."""
+    total = 0
+    gap = []
+
+    for cell in list(pattern) + [OCCUPIED]:
+        if cell != OCCUPIED:
+            gap.append(cell)
+        elif gap:
+            total += gap_pieces(gap)
+            gap = []
+
+    return min(total, UNREACHABLE)
+
+
+def build_database() -> bytes:
+    """Computes the number of pieces for every line pattern, in index order."""
+    table = bytearray(PATTERN_COUNT)
+
+    for index in range(PATTERN_COUNT):
+        pattern = []
+        value = index
+        for _ in range(PATTERN_CELLS):
+            value, digit = divmod(value, 3)
+            pattern.append(digit)
+        table[index] = pattern_pieces(pattern)
+
+    return bytes(table)
+
+
+def write_database(path=DATABASE_PATH):
+    with open(path, "wb") as f:
+        f.write(HEADER)
+        f.write(build_database())
+
+
+class LinePatternDatabase:
+    """Read-only view of the database file. The file is memory-mapped, so it is shared between processes and costs
+    nothing to open. If the file is missing or was built for a different board size, the table is built in memory."""
+
+    def __init__(self, path=DATABASE_PATH):
+        self.table = None
+        try:
+            with open(path, "rb") as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if table[:len(HEADER)] == HEADER and len(table) == len(HEADER) + PATTERN_COUNT:
+                self.table = memoryview(table)[len(HEADER):]
+        except (OSError, ValueError):
+            pass
+
+        if self.table is None:
+            self.table = build_database()
+
+    def pieces(self, empty: int, blocked: int) -> int:
+        """Returns the number of pieces for a line, given bitmasks of its empty and blocked cells (bit k - 1 for the
+        cell k steps from the target)."""
+        return self.table[DIGIT_VALUES[empty] + DIGIT_VALUES[blocked]]
+
+
+_database = None
+
+
+def line_database() -> LinePatternDatabase:
+    """Returns the shared database, opening it on first use."""
+    global _database
+    if _database is None:
+        _database = LinePatternDatabase()
+    return _database
+
+
+if __name__ == "__main__":
+    write_database(sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH)
@@ -1,91 +1,87 @@
 # COMP30024 Artificial Intelligence, Semester 1 2024
 # Project Part A: Single Player Tetress
 
-from .core import Direction
-
-SEARCH_LIMIT = 4
-
-
-class PlacementNode:
-    """ A node for a potential placement of a square on the board to form a piece. Adapted and modified from the
-    AIMA's Python Library function for a search tree node."""
-
-    def __init__(self, state, parent=None):
-        """Create a search tree Node, derived from a parent by an action."""
-        self.state = state
-        self.parent = parent
-        self.depth = self.parent.depth + 1 if parent else 0
-
-    def expand(self, problem):
-        """List the nodes reachable in one step from this node."""
-        return [self.child_node(next_state) for next_state in problem.actions(self.state, self.path())]
-
-    def child_node(self, next_state):
-        """Create a new child node for a possible placement action."""
-        next_node = PlacementNode(next_state, self)
-        return next_node
-
-    def path(self):
-        """Return a list of nodes forming the path from the root to this node."""
-        node, path_back = self, []
-        while node:
-            path_back.append(node.state)
-            node = node.parent
-        return list(reversed(path_back))
-
-
-class PlacementProblem:
-    """ A class which defines the constructors and possible actions for finding all possible piece positions on the
-    current game board. Adapted from AIMA's Python Library """
-
-    def __init__(self, initial, current_map):
-        """ Initialise the problem with the initial starting coordinate and the current game map """
-        self.initial = initial
-        self.current_map = current_map
-
-    def actions(self, state, last_moves):
-        """ Return the list of actions which can be achieved given the current state of the game board and the last
-        moves done in parent search tree nodes"""
-        # Pieces can be placed in four possible directions on the game board
-        possible_moves = [state + Direction.Up, state + Direction.Down, state + Direction.Left,
-                          state + Direction.Right]
-
-        # Check previous squares in the current piece and add these to the possible placement list
-        for element in last_moves:
-            if element is not state:
-                possible_moves.append(element + Direction.Up)
-                possible_moves.append(element + Direction.Down)
-                possible_moves.append(element + Direction.Left)
-                possible_moves.append(element + Direction.Right)
-
-        # Cannot be placed if a piece is already taking that space
-        possible_moves = [element for element in possible_moves if element not in self.current_map]
-
-        # Cannot be placed if we have already placed a piece there during this iteration of piece forming
-        possible_moves = [element for element in possible_moves if element not in last_moves]
-
-        return possible_moves
-
-
-def find_all_placements(problem, limit=SEARCH_LIMIT):
-    """ Recursively finds all possible combinations of pieces which can be placed from a given starting coordinate.
-    Adapted from AIMA's Python Library function for depth-limited search"""
-
+from .core import PlaceAction, BOARD_N
+from .bitboard import INDEX_COORDS, LINE_MASKS, mask_indices, neighbours
+from .helpers import PIECE_SIZE
+
+
+def find_tetrominoes(size=PIECE_SIZE):
+    """Finds every fixed (i.e. rotations and reflections counted separately) polyomino of the given size, as tuples
+    of (row, column) offsets normalised so that the smallest offset in each dimension is 0. There are 19 tetrominoes."""
+    shapes = {((0, 0),)}
+
+    for _ in range(size - 1):
+        grown = set()
+        for shape in shapes:
+            # Grow each shape by one square in every possible direction
+            for r, c in shape:
+                for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+                    square = (r + dr, c + dc)
+                    if square not in shape:
+                        grown.add(shape + (square,))
+
+        # Normalise the grown shapes so translations of the same shape are only recorded once
+        shapes = set()
+        for shape in grown:
+            min_r = min(r for r, _ in shape)
+            min_c = min(c for _, c in shape)
+            shapes.add(tuple(sorted((r - min_r, c - min_c) for r, c in shape)))
+
+    return sorted(shapes)
+
+
+def build_placement_index(board_n=BOARD_N):
+    """Enumerates every placement of every tetromino at every anchor on the torus. Returns the bitmask of each
+    placement, along with the placements which cover each cell of the board. The board size can be changed for
+    boards other than the standard one (see sized.py)."""
+    cell_count = board_n * board_n
+    masks = []
+    seen = set()
+
+    for shape in find_tetrominoes():
+        for anchor in range(cell_count):
+            anchor_r, anchor_c = divmod(anchor, board_n)
+            mask = 0
+            for r, c in shape:
+                mask |= 1 << ((anchor_r + r) % board_n * board_n + (anchor_c + c) % board_n)
+
+            if mask not in seen:
+                seen.add(mask)
+                masks.append(mask)
+
+    by_cell = [[] for _ in range(cell_count)]
+    for placement, mask in enumerate(masks):
+        for cell in mask_indices(mask):
+            by_cell[cell].append(placement)
+
+    return tuple(masks), tuple(tuple(placements) for placements in by_cell)
+
+
+# The set of placements on the board is fixed, so it is built once when the program starts
+PLACEMENT_MASKS, PLACEMENTS_BY_CELL = build_placement_index()
+PLACEMENT_ACTIONS = tuple(PlaceAction(*(INDEX_COORDS[i] for i in mask_indices(mask))) for mask in PLACEMENT_MASKS)
+
+# The rows and columns which pass through each placement, keyed by its mask. These are the only lines which placing
+# the piece can complete.
+PLACEMENT_LINES = {mask: tuple(line for line in LINE_MASKS if line & mask) for mask in PLACEMENT_MASKS}
+
+# The empty squares next to each placement, keyed by its mask. A placement is only allowed if one of them is red.
+PLACEMENT_NEIGHBOURS = {mask: neighbours(mask) & ~mask for mask in PLACEMENT_MASKS}
+
+
+def find_all_placements(board):
+    """Finds every placement which is adjacent to a red square and only covers empty squares on the board. Returns
+    the placements as indices into PLACEMENT_MASKS/PLACEMENT_ACTIONS, with each placement listed once."""
+    occupied = board.occupied
     placements = []
+    seen = set()
+
+    # A piece can be placed if it covers at least one empty square next to a red square
+    for cell in mask_indices(board.frontier()):
+        for placement in PLACEMENTS_BY_CELL[cell]:
+            if placement not in seen and not PLACEMENT_MASKS[placement] & occupied:
+                seen.add(placement)
+                placements.append(placement)
 
-    def recursive_dls(node, curr_problem, curr_limit):
-        if curr_limit == 1:
-            # Reached 4 placements, add this piece to the list of possible placements
-            # Sort to avoid adding duplicates
-            new_path = sorted(node.path())
-            if new_path not in placements:
-                placements.append(new_path)
-
-        else:
-            # Find more possible places where we can place squares and search recursively from there
-            for child in node.expand(curr_problem):
-                if child not in node.path():
-                    recursive_dls(child, curr_problem, curr_limit - 1)
-
-    recursive_dls(PlacementNode(problem.initial, None), problem, limit)
     return placements
@@ -1,32 +1,41 @@
 # COMP30024 Artificial Intelligence, Semester 1 2024
 # Project Part A: Single Player Tetress
 
-import itertools
-from queue import PriorityQueue
-from dataclasses import dataclass, field
-from typing import Any
-
-from .core import PlayerColor, Coord, PlaceAction, BOARD_N
-from .placement_algorithms import find_all_placements, PlacementProblem
-from .helpers import dict_hash, find_gaps, find_starting_positions
+import time
+from functools import lru_cache
+
+from .core import PlaceAction, BOARD_N
+from .bitboard import BitBoard, ROW_MASKS, COL_MASKS, coords_mask, mask_coords, line_bits, translate
+from .placement_algorithms import find_all_placements, PLACEMENT_ACTIONS, PLACEMENT_LINES, PLACEMENT_NEIGHBOURS
+from .helpers import find_gaps, line_fill_cost, PIECE_SIZE
+from .pattern_database import line_database
+from .open_lists import HeapOpenList
+from .stats import TimedProblem, TimedOpenList
 from .utils import render_board
 
 PATH_COST = 4
 LARGEST_DISTANCE = 2 * BOARD_N
+IDA_TABLE_SIZE = 100_000
+# A weight of GREEDY orders the pass by the heuristic alone (greedy best-first search), and stops at its first solution
+GREEDY = float("inf")
+ANYTIME_WEIGHTS = (GREEDY, 3, 2, 1.5, 1.25, 1)
 
+# Number of empty squares between a line and another line i steps away from it on the torus
+LINE_DISTANCE = tuple(max(min(i, BOARD_N - i) - 1, 0) for i in range(BOARD_N))
 
-@dataclass(order=True)
-class PrioritisedItem:
-    """Class defining an entry in the priority queue which is only sorted based on priority. Adapted from the Python
-    Standard Libray Queue documentation page."""
-    priority: int
-    heuristic_value: int = field(compare=False)
-    item: Any = field(compare=False)
+# Every square of a line except the target, after the line has been shifted so the target is dropped
+PATTERN_MASK = (1 << (BOARD_N - 1)) - 1
 
 
 class SearchNode:
     """Node used when conducting A* search to find the optimal solution to the search problem. This code is adapted
-    from the Node class in AIMA's Pyhton Library."""
+    from the Node class in AIMA's Pyhton Library.
+
+    Millions of nodes can be alive at once on hard boards, so nodes use __slots__ and only keep what the search needs:
+    the board, the parent, the action (shared with PLACEMENT_ACTIONS rather than copied) and the path cost. The path
+    is only walked when the solution is read off the goal node."""
+
+    __slots__ = ("state", "parent", "action", "path_cost")
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
@@ -34,7 +43,11 @@ class SearchNode:
         self.parent = parent
         self.action = action
         self.path_cost = path_cost
-        self.depth = parent.depth + 1 if parent else 0
+
+    @property
+    def depth(self):
+        """Number of actions from the root to this node. Only used for debugging, so it is not stored."""
+        return self.path_cost // PATH_COST
 
     def expand(self, problem):
         """List the nodes reachable in one step from this node."""
@@ -59,91 +72,46 @@ class SearchNode:
         return list(reversed(path_back))
 
     def __hash__(self):
-        # We use the hash value of the state
-        # stored in the node instead of the node
-        # object itself to quickly search a node
-        # with the same state in a Hash Table
-        return dict_hash(self.solution())
+        # We use the hash value of the state (the BitBoard's Zobrist key, so O(1)) instead of the node object itself
+        # to quickly search a node with the same state in a Hash Table
+        return hash(self.state)
 
 
 class SearchProblem:
     """The class for the optimal solution problem. Defines heuristics and allowed actions given the initial game
-    state. Adapted from AIMA's Python library Problem class."""
+    state. Adapted from AIMA's Python library Problem class. States are BitBoards, so the dictionary board is only
+    converted once when the problem is created."""
 
-    def __init__(self, initial, target):
-        """The constructor specifies the initial board and the target coordinate."""
-        self.initial = initial
+    def __init__(self, initial, target, heuristic="gaps"):
+        """The constructor specifies the initial board and the target coordinate. The heuristic is either "gaps" (the
+        original heuristic, built on find_gaps) or "pdb" (the admissible pattern database heuristic)."""
+        self.initial = initial if isinstance(initial, BitBoard) else BitBoard.from_dict(initial)
         self.target = target
+        self.target_row = ROW_MASKS[target.r]
+        self.target_col = COL_MASKS[target.c]
+        self.heuristic_name = heuristic
+
+        if heuristic == "pdb":
+            self.database = line_database()
+            self.heuristic = self.pattern_heuristic
+        elif heuristic != "gaps":
+            raise ValueError(f"Unknown heuristic: {heuristic}")
 
     def actions(self, state):
         """This class finds all possible placements of game pieces given the current board state."""
-        possible_actions = []
-        place_actions = []
-
-        # Find squares which are adjacent to red blocks
-        placement_positions = find_starting_positions(state)
-
-        for position in placement_positions:
-            current_actions = find_all_placements(PlacementProblem(position, state))
-            for element in current_actions:
-                possible_actions.append(element)
-
-        # Remove any duplicate states from the list
-        possible_actions = list(possible_actions for possible_actions, _ in itertools.groupby(possible_actions))
-
-        # Turn these combinations into PlaceActions and return
-        for element in possible_actions:
-            place_actions.append(PlaceAction(element[0], element[1], element[2], element[3]))
-
-        return place_actions
+        return [PLACEMENT_ACTIONS[placement] for placement in find_all_placements(state)]
 
     def result(self, state, action: PlaceAction):
         """Creates the new board state after placing the new piece. Also checks if any lines were formed and will
         remove these squares if found."""
-        new_state = state.copy()
-        new_state[action.c1] = PlayerColor.RED
-        new_state[action.c2] = PlayerColor.RED
-        new_state[action.c3] = PlayerColor.RED
-        new_state[action.c4] = PlayerColor.RED
+        piece = coords_mask((action.c1, action.c2, action.c3, action.c4))
+        new_state = state.place(piece)
 
         if not self.goal_test(new_state):
-            # We need to check these rows and columns for any full lines
-            rows = {action.c1.r, action.c2.r, action.c3.r, action.c4.r}
-            cols = {action.c1.c, action.c2.c, action.c3.c, action.c4.c}
-
-            row_duplicate = set()
-            col_duplicate = set()
-
-            for element in rows:
-                duplicates = True
-
-                for i in range(0, BOARD_N):
-                    if Coord(element, i) not in new_state.keys():
-                        duplicates = False
-
-                if duplicates:
-                    row_duplicate.add(element)
-
-            for element in cols:
-                duplicates = True
-
-                for i in range(0, BOARD_N):
-                    if Coord(i, element) not in new_state.keys():
-                        duplicates = False
-
-                if duplicates:
-                    col_duplicate.add(element)
-
-            # Remove the squares if we found duplicates
-            for element in row_duplicate:
-                for i in range(0, BOARD_N):
-                    if Coord(element, i) in new_state.keys():
-                        new_state.pop(Coord(element, i))
-
-            for element in col_duplicate:
-                for i in range(0, BOARD_N):
-                    if Coord(i, element) in new_state.keys():
-                        new_state.pop(Coord(i, element))
+            # Only the rows and columns running through the new piece can have been completed
+            cleared = new_state.full_lines(PLACEMENT_LINES[piece])
+            if cleared:
+                new_state = new_state.clear(cleared)
 
         return new_state
 
@@ -156,87 +124,619 @@ class SearchProblem:
         3. The heuristic adds a higher cost if there are smaller gaps in the row/column than for larger gaps. This is
             explained more in the helpers.py file."""
 
-        row_distance = col_distance = LARGEST_DISTANCE
-
-        for key, value in state.items():
-            if value == PlayerColor.RED:
-                first = key - self.target
-                second = self.target - key
-
-                # Find the minimum distance between the closest red square and the associated row/column
-                # of the target coordinate
-                curr_row_min = min(first.c - 1 if first.c > 0 else 0, second.c - 1 if second.c > 0 else 0)
-                curr_col_min = min(first.r - 1 if first.r > 0 else 0, second.r - 1 if second.r > 0 else 0)
-
-                if curr_row_min < row_distance:
-                    row_distance = curr_row_min
-
-                if curr_col_min < col_distance:
-                    col_distance = curr_col_min
+        row_distance, col_distance = self.red_distances(state)
 
         # Calculate the cost of filling the row/column and return the minimum cost out of rows or columns
         fill_row, fill_col = find_gaps(state, self.target, row_distance, col_distance)
         return min(fill_row + row_distance, fill_col + col_distance)
 
-    def goal_test(self, state):
-        """Checks whether the specified state is a valid goal state."""
-        row_success = column_success = True
-
-        for i in range(0, BOARD_N):
-            if Coord(self.target.r, i) not in state.keys():
-                row_success = False
-                break
-
-        for i in range(0, BOARD_N):
-            if Coord(i, self.target.c) not in state.keys():
-                column_success = False
-                break
+    def red_distances(self, state):
+        """Finds the number of squares between the closest red square and the column of the target coordinate, and
+        between the closest red square and the row of the target coordinate."""
+        row_distance = col_distance = LARGEST_DISTANCE
 
-        if row_success or column_success:
-            return True
+        # Every red square in the same column is the same distance from the target column, so we only need to test
+        # each column (and row) once
+        for i in range(BOARD_N):
+            if state.red & COL_MASKS[(self.target.c + i) % BOARD_N] and LINE_DISTANCE[i] < row_distance:
+                row_distance = LINE_DISTANCE[i]
+            if state.red & ROW_MASKS[(self.target.r + i) % BOARD_N] and LINE_DISTANCE[i] < col_distance:
+                col_distance = LINE_DISTANCE[i]
+
+        return row_distance, col_distance
+
+    def pattern_heuristic(self, state):
+        """An admissible heuristic built on the line pattern database (see pattern_database.py). For the target's row
+        and column it takes the fewest pieces needed to fill the line, plus the pieces needed just to bridge the gap
+        between the closest red square and the line, and returns the cheaper of the two lines.
+
+        A blocked square in the line can only be filled by a short run once a neighbouring parallel line has been
+        cleared. So the database's count with blocked squares is only used where it is lower than filling both our
+        line and the emptier of the two neighbouring lines, both of which are needed for that to happen."""
+        occupied = state.occupied
+        target = self.target
+        row_distance, col_distance = self.red_distances(state)
+
+        col_pieces = self.line_pieces(
+            occupied, target.c, target.r, True, COL_MASKS[(target.c - 1) % BOARD_N],
+            COL_MASKS[(target.c + 1) % BOARD_N], translate(occupied, 0, 1) & translate(occupied, 0, -1), row_distance)
+        row_pieces = self.line_pieces(
+            occupied, target.r, target.c, False, ROW_MASKS[(target.r - 1) % BOARD_N],
+            ROW_MASKS[(target.r + 1) % BOARD_N], translate(occupied, 1, 0) & translate(occupied, -1, 0), col_distance)
+
+        return PATH_COST * min(col_pieces, row_pieces)
+
+    def line_pieces(self, occupied, line, start, vertical, before, after, sides_occupied, distance):
+        """Lower bound on the pieces needed to complete one of the target's lines, see pattern_heuristic."""
+        # Drop the target itself (bit 0), which is always occupied
+        empty = ~line_bits(occupied, line, start, vertical) >> 1 & PATTERN_MASK
+        if not empty:
+            return 0
+        blocked = line_bits(sides_occupied, line, start, vertical) >> 1 & empty
+
+        pieces = self.database.pieces(empty, 0)
+        if blocked:
+            neighbour_empty = min(BOARD_N - (occupied & before).bit_count(), BOARD_N - (occupied & after).bit_count())
+            unblocked = max(pieces, -(-neighbour_empty // PIECE_SIZE))
+            pieces = min(self.database.pieces(empty, blocked), unblocked)
+
+        # The first piece to reach the line covers at most 3 of the squares between it and the closest red square
+        return pieces + -(-max(distance - (PIECE_SIZE - 1), 0) // PIECE_SIZE)
 
-        return False
+    def goal_test(self, state):
+        """Checks whether the specified state is a valid goal state."""
+        occupied = state.occupied
+        return occupied & self.target_row == self.target_row or occupied & self.target_col == self.target_col
 
     def path_cost(self, prev_cost):
         return prev_cost + PATH_COST
 
 
-def astar_search(problem):
-    # node_number = 1
-
-    # Create an initial node for search and initialise a PQ for new nodes
+def commuting_actions(node, actions, best_costs):
+    """Move order pruning. Returns the actions worth expanding from a node, along with the number that were pruned.
+
+    Say the node was reached by placing piece a on its parent's board P, and b is one of the node's actions. If a
+    cleared no lines, b was already allowed on P, and placing b clears no lines either, then the two placements
+    commute: placing b and then a on P gives exactly the same board, at the same cost. So out of each such pair only
+    the order which places the smaller piece (by mask) first needs to be searched, and b is pruned here when b < a.
+
+    The transposition table can stop the other order from being searched, though, if P + b was reached some other
+    way. So b is only pruned once P + b is known to be in the table at the same cost as this node; whichever node put
+    it there is (or will be) expanded, and reaches the same child. If that node prunes the child in turn, it is for a
+    piece which comes after a in the ordering, so this cannot go round in circles. With an admissible heuristic every
+    node on an optimal path is still expanded, so optimality is preserved.
+
+    This prunes by move order alone. Placements far from the target can't be pruned: red squares anywhere can grow
+    towards the target, and clearing any row or column frees up squares on the target's column or row."""
+    parent = node.parent
+    if parent is None:
+        return actions, 0
+
+    last = node.action
+    last_mask = coords_mask((last.c1, last.c2, last.c3, last.c4))
+    occupied = node.state.occupied
+    parent_state = parent.state
+    if occupied != parent_state.occupied | last_mask:
+        # The last placement cleared lines, so it does not commute with anything
+        return actions, 0
+
+    kept = []
+    for action in actions:
+        mask = coords_mask((action.c1, action.c2, action.c3, action.c4))
+        if mask < last_mask and PLACEMENT_NEIGHBOURS[mask] & parent_state.red:
+            filled = occupied | mask
+            if (not any(filled & line == line for line in PLACEMENT_LINES[mask])
+                    and best_costs.get(parent_state.place(mask)) == node.path_cost):
+                continue
+        kept.append(action)
+
+    return kept, len(actions) - len(kept)
+
+
+def astar_search(problem, open_list=HeapOpenList, stats=None, prune=False):
+    """Runs A* search on the problem. The open list class can be swapped out, see open_lists.py for the options. If
+    a SearchStats object is given, it is filled in with node counts (and phase timings, if enabled) when the search
+    finishes. If `prune` is set, actions which only reorder placements are pruned, see commuting_actions."""
+    nodes_expanded = nodes_generated = nodes_deduplicated = nodes_pruned = max_frontier = 0
+
+    # Create an initial node for search and initialise the open list for new nodes
     node = SearchNode(problem.initial)
-    queue = PriorityQueue()
+    queue = open_list()
+
+    if stats is not None and stats.timing:
+        problem = TimedProblem(problem, stats)
+        queue = TimedOpenList(queue, stats)
+
     heuristic = problem.heuristic(node.state)
-    queue.put(PrioritisedItem(node.path_cost + heuristic, heuristic, node))
-    seen = set()
+    queue.push(node.path_cost + heuristic, heuristic, node)
+
+    # Transposition table holding the cheapest path cost found so far to each board state. Different placement
+    # orders (and different placements followed by line clears) often reach the same board.
+    best_costs = {node.state: node.path_cost}
+
+    try:
+        while queue:
+            # Get the next item with the lowest cost from the queue
+            priority, heuristic, node = queue.pop()
+
+            # Skip stale entries for boards which have since been reached more cheaply
+            if node.path_cost > best_costs[node.state]:
+                continue
+
+            # BELOW INSTRUCTION USED TO SHOW PROGRESS OF SEARCH
+            # print(f"PRIORITY: {priority}\n{render_board(node.state.to_dict(), problem.target, ansi = True)}")
+
+            # Only check if it is a goal state if the value of the heuristic function is 0
+            if heuristic == 0:
+                if problem.goal_test(node.state):
+                    return node
+
+            # Expand the current state and add these children to the queue
+            nodes_expanded += 1
+            actions = problem.actions(node.state)
+            if prune:
+                actions, pruned = commuting_actions(node, actions, best_costs)
+                nodes_pruned += pruned
+            for action in actions:
+                child = node.child_node(action, problem)
+                nodes_generated += 1
+                best_cost = best_costs.get(child.state)
+
+                # Do not include boards that we have already reached with the same or a lower cost
+                if best_cost is None or child.path_cost < best_cost:
+                    heuristic = problem.heuristic(child.state)
+                    queue.push(child.path_cost + heuristic, heuristic, child)
+                    best_costs[child.state] = child.path_cost
+                else:
+                    nodes_deduplicated += 1
+
+            if len(queue) > max_frontier:
+                max_frontier = len(queue)
+
+        # Queue is empty and we have not found a solution, we cannot solve for the particular board state
+        return None
+
+    finally:
+        # Record the statistics even if the search is interrupted part way through
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+            stats.nodes_deduplicated += nodes_deduplicated
+            stats.nodes_pruned += nodes_pruned
+            stats.max_frontier = max(stats.max_frontier, max_frontier)
+
+
+@lru_cache(maxsize=None)
+def red_line_distances(red_lines: int) -> tuple[int, ...]:
+    """For a set of lines holding red squares (bit i for line i), finds the number of squares between each line and
+    the closest of them, as in SearchProblem.red_distances."""
+    return tuple(min((LINE_DISTANCE[(line - i) % BOARD_N] for i in range(BOARD_N) if red_lines >> i & 1),
+                     default=LARGEST_DISTANCE) for line in range(BOARD_N))
+
+
+def red_distances_by_line(state) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Finds the number of squares between each column and the closest red square, and likewise for each row."""
+    red = state.red
+    # Fold the rows on top of each other to find the columns holding red squares, and likewise for the rows
+    red_cols = red_rows = 0
+    for i, row in enumerate(ROW_MASKS):
+        if red & row:
+            red_cols |= (red & row) >> row.bit_length() - BOARD_N
+            red_rows |= 1 << i
+    return red_line_distances(red_cols), red_line_distances(red_rows)
+
+
+def gaps_heuristic(state, columns, rows):
+    """The lowest "gaps" heuristic (see SearchProblem.heuristic) over many targets, given as dictionaries mapping the
+    targets' columns to one of their rows and the targets' rows to one of their columns. Each target's heuristic is
+    the cheaper of a term for its column and a term for its row, and the cost of filling a line does not depend on
+    which of its occupied squares is the target. So each term is worked out once per line rather than per target.
+
+    Returns the heuristic along with the line it came from: a column index, or BOARD_N plus a row index."""
+    occupied = state.occupied
+    col_distances, row_distances = red_distances_by_line(state)
+    best = best_line = None
+
+    for c, r in columns.items():
+        distance = col_distances[c]
+        h = line_fill_cost(line_bits(occupied, c, r, True), distance) + distance
+        if best is None or h < best:
+            best, best_line = h, c
+    for r, c in rows.items():
+        distance = row_distances[r]
+        h = line_fill_cost(line_bits(occupied, r, c, False), distance) + distance
+        if h < best:
+            best, best_line = h, BOARD_N + r
+
+    return best, best_line
+
+
+def pattern_lines_heuristic(problem, state, columns, rows):
+    """The lowest "pdb" heuristic (see SearchProblem.pattern_heuristic) over many targets, given as for
+    gaps_heuristic, using the pattern database of the "pdb" problem. A line's pattern is read starting from the
+    target, but the database adds up the pieces needed for each gap between occupied squares, so starting from any
+    other occupied square of the line gives the same count. So again each term is worked out once per line.
+
+    Returns the heuristic along with the line it came from, as for gaps_heuristic."""
+    occupied = state.occupied
+    col_distances, row_distances = red_distances_by_line(state)
+    best = best_line = None
+
+    sides_occupied = translate(occupied, 0, 1) & translate(occupied, 0, -1)
+    for c, r in columns.items():
+        pieces = problem.line_pieces(occupied, c, r, True, COL_MASKS[(c - 1) % BOARD_N], COL_MASKS[(c + 1) % BOARD_N],
+                                     sides_occupied, col_distances[c])
+        if best is None or pieces < best:
+            best, best_line = pieces, c
+    sides_occupied = translate(occupied, 1, 0) & translate(occupied, -1, 0)
+    for r, c in rows.items():
+        pieces = problem.line_pieces(occupied, r, c, False, ROW_MASKS[(r - 1) % BOARD_N], ROW_MASKS[(r + 1) % BOARD_N],
+                                     sides_occupied, row_distances[r])
+        if pieces < best:
+            best, best_line = pieces, BOARD_N + r
+
+    return PATH_COST * best, best_line
+
+
+def multi_target_search(problems, open_list=HeapOpenList, stats=None):
+    """Runs a single A* search for several problems which share an initial board and only differ in their target.
+    Returns a dictionary mapping each problem's target to its goal node, or None if it cannot be removed.
+
+    Placements and line clears do not depend on the target, except that a placement which completes a target's line
+    ends the game there instead of clearing the line. So one search tree serves every target: each child is the board
+    with its full lines cleared, and when the placement completes an unsolved target's line, a goal node holding the
+    board before clearing is queued for that target as well. A target is solved when its goal node is popped. With
+    the heuristic taken as the lowest over the unsolved targets, the search works outwards from the easiest target,
+    and (with an admissible heuristic) each target gets the same cost as a search for it alone.
+
+    The heuristic terms for a line are shared by every target in it (see gaps_heuristic and pattern_lines_heuristic),
+    so each board costs one term per line holding a target rather than two per target. Solving a target can raise
+    the heuristic of queued boards, whose f-values are then too low. Each entry remembers which of the targets' lines
+    its heuristic came from, and is only re-evaluated, and re-queued if its f-value went up, once that line has no
+    unsolved targets left."""
+    nodes_expanded = nodes_generated = nodes_deduplicated = max_frontier = 0
+    unsolved = {problem.target: problem for problem in problems}
+    solutions = dict.fromkeys(unsolved)
+    gaps = problems[0].heuristic_name == "gaps"
+    columns = rows = target_mask = None
+
+    def update_lines():
+        nonlocal columns, rows, target_mask
+        columns = {target.c: target.r for target in unsolved}
+        rows = {target.r: target.c for target in unsolved}
+        target_mask = coords_mask(unsolved)
+
+    def heuristic(state):
+        if gaps:
+            return gaps_heuristic(state, columns, rows)
+        return pattern_lines_heuristic(problems[0], state, columns, rows)
+
+    def active(line):
+        return line in columns if line < BOARD_N else line - BOARD_N in rows
+
+    initial = problems[0].initial
+    node = SearchNode(initial)
+    for target, problem in list(unsolved.items()):
+        if problem.goal_test(initial):
+            solutions[target] = node
+            del unsolved[target]
+    if not unsolved:
+        return solutions
+    update_lines()
+
+    queue = open_list()
+    h, source = heuristic(initial)
+    queue.push(h, h, (node, None, source))
+    best_costs = {initial: 0}
+
+    try:
+        while queue and unsolved:
+            priority, h, (node, target, source) = queue.pop()
+
+            if target is not None:
+                # A goal node, which solves its target unless an earlier one already did
+                if target in unsolved:
+                    solutions[target] = node
+                    del unsolved[target]
+                    update_lines()
+                continue
+
+            if node.path_cost > best_costs[node.state]:
+                continue
+
+            if not active(source):
+                new_h, source = heuristic(node.state)
+                if new_h > h:
+                    queue.push(node.path_cost + new_h, new_h, (node, None, source))
+                    continue
+
+            nodes_expanded += 1
+            child_cost = node.path_cost + PATH_COST
+            for action in problems[0].actions(node.state):
+                nodes_generated += 1
+                piece = coords_mask((action.c1, action.c2, action.c3, action.c4))
+                child_state = node.state.place(piece)
+                cleared = child_state.full_lines(PLACEMENT_LINES[piece])
+                if cleared:
+                    # A target's line is complete exactly when the target is one of the squares the lines would clear
+                    if cleared & target_mask:
+                        for goal_target in mask_coords(cleared & target_mask):
+                            queue.push(child_cost, 0, (SearchNode(child_state, node, action, child_cost), goal_target,
+                                                       None))
+                    child_state = child_state.clear(cleared)
+
+                best_cost = best_costs.get(child_state)
+                if best_cost is None or child_cost < best_cost:
+                    best_costs[child_state] = child_cost
+                    child_h, source = heuristic(child_state)
+                    queue.push(child_cost + child_h, child_h,
+                               (SearchNode(child_state, node, action, child_cost), None, source))
+                else:
+                    nodes_deduplicated += 1
+
+            if len(queue) > max_frontier:
+                max_frontier = len(queue)
+
+        return solutions
+
+    finally:
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+            stats.nodes_deduplicated += nodes_deduplicated
+            stats.max_frontier = max(stats.max_frontier, max_frontier)
+
+
+def partial_expansion_search(problem, open_list=HeapOpenList, stats=None):
+    """Runs partial expansion A* (PEA*) on the problem. The first time a node is popped, every child is generated
+    and evaluated as usual, but only the children whose f-value is no more than the node's own go into the open list.
+    The rest are kept with the node as compact (f-value, heuristic value, action, board) entries, and the node goes
+    back into the open list with the smallest f-value among them. Each time it is popped again, the children with
+    that f-value get their search nodes and are queued.
+
+    So PEA* does the same work per node as A*: every child's board and heuristic are worked out on the first
+    expansion, as there is no cheaper way to tell which children are worth generating. What it saves is open-list
+    memory. On boards with a high branching factor most children have a larger f-value than the optimal cost, so
+    they never get a search node or an open-list entry. Their boards cost nothing extra, as the transposition table
+    keeps them anyway."""
+    nodes_expanded = nodes_generated = nodes_deduplicated = max_frontier = 0
+
+    node = SearchNode(problem.initial)
+    queue = open_list()
 
-    while not queue.empty():
-        # Get the next item with the lowest cost from the queue
-        retrieval = queue.get()
-        node = retrieval.item
-        # node_number += 1
+    if stats is not None and stats.timing:
+        problem = TimedProblem(problem, stats)
+        queue = TimedOpenList(queue, stats)
 
-        # BELOW INSTRUCTIONS USED TO SHOW PROGRESS OF SEARCH
-        # print(f"NODE NUMBER: {node_number}")
-        # print(f"PRIORITY: {retrieval.priority}\n{render_board(node.state, problem.target, ansi = True)}")
+    # Queue entries are (node, deferred children), where the deferred children are None until the first expansion
+    heuristic = problem.heuristic(node.state)
+    queue.push(node.path_cost + heuristic, heuristic, (node, None))
+    best_costs = {node.state: node.path_cost}
+
+    try:
+        while queue:
+            priority, heuristic, (node, deferred) = queue.pop()
+
+            # Skip stale entries for boards which have since been reached more cheaply. Their deferred children are
+            # covered by the cheaper node.
+            if node.path_cost > best_costs[node.state]:
+                continue
+
+            if deferred is None:
+                # Only check if it is a goal state if the value of the heuristic function is 0
+                if heuristic == 0 and problem.goal_test(node.state):
+                    return node
+
+                nodes_expanded += 1
+                deferred = []
+                for child in node.expand(problem):
+                    nodes_generated += 1
+                    best_cost = best_costs.get(child.state)
+                    if best_cost is not None and child.path_cost >= best_cost:
+                        nodes_deduplicated += 1
+                        continue
+
+                    # Deferred children are recorded in the transposition table too, so that other nodes which
+                    # reach the same board at the same cost leave it to us
+                    best_costs[child.state] = child.path_cost
+                    child_heuristic = problem.heuristic(child.state)
+                    child_priority = child.path_cost + child_heuristic
+                    if child_priority <= priority:
+                        queue.push(child_priority, child_heuristic, (child, None))
+                    else:
+                        deferred.append((child_priority, child_heuristic, child.action, child.state))
+
+                # Sort the deferred children so the most promising are at the end, ready to be popped
+                deferred.sort(key=lambda entry: entry[:2], reverse=True)
+            else:
+                # Queue the deferred children whose turn has come
+                child_cost = problem.path_cost(node.path_cost)
+                while deferred and deferred[-1][0] <= priority:
+                    child_priority, child_heuristic, action, child_state = deferred.pop()
+                    if child_cost <= best_costs[child_state]:
+                        queue.push(child_priority, child_heuristic, (SearchNode(child_state, node, action, child_cost),
+                                                                     None))
+                    else:
+                        nodes_deduplicated += 1
+
+            # Put the node back with the f-value of its next most promising child
+            if deferred:
+                queue.push(deferred[-1][0], deferred[-1][1], (node, deferred))
+
+            if len(queue) > max_frontier:
+                max_frontier = len(queue)
+
+        return None
+
+    finally:
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+            stats.nodes_deduplicated += nodes_deduplicated
+            stats.max_frontier = max(stats.max_frontier, max_frontier)
+
+
+def ida_star_search(problem, stats=None, max_nodes=IDA_TABLE_SIZE, prune=False):
+    """Runs iterative deepening A* (IDA*) on the problem. Each iteration is a depth first search which cuts off any
+    node whose f-value exceeds the current bound, and the next bound is the smallest f-value that was cut off. Only
+    the current path and its siblings are kept in memory, so memory use is bounded on large, sparse boards, at the
+    cost of re-expanding nodes on every iteration.
+
+    Within an iteration a transposition table of at most `max_nodes` boards skips boards which were already searched
+    with the same or a lower path cost, as the earlier search covered everything below them. The table is emptied
+    between iterations. The table only ever skips boards which have already been covered, so solutions stay optimal.
+    The table also backs move order pruning when `prune` is set, see commuting_actions."""
+    nodes_expanded = nodes_generated = nodes_pruned = 0
+
+    def bounded_search(node, heuristic, bound, table):
+        """Searches below node, returning either a goal node or the smallest f-value that exceeded the bound."""
+        nonlocal nodes_expanded, nodes_generated, nodes_pruned
+
+        priority = node.path_cost + heuristic
+        if priority > bound:
+            return None, priority
 
         # Only check if it is a goal state if the value of the heuristic function is 0
-        if retrieval.heuristic_value == 0:
-            if problem.goal_test(node.state):
-                # print(f"NUMBER OF NODES EXPANDED: {node_number}")
-                return node
-
-        # Expand the current state and add these children to the queue
-        for child in node.expand(problem):
-            curr_hash = hash(child)
-
-            # Do not include nodes that we have already inserted into the PQ
-            if curr_hash not in seen:
-                heuristic = problem.heuristic(child.state)
-                queue.put(PrioritisedItem(child.path_cost + heuristic, heuristic, child))
-                seen.add(curr_hash)
-
-    # Queue is empty and we have not found a solution, we cannot solve for the particular board state
-    # print(f"NUMBER OF NODES EXPANDED: {node_number}")
-    return None
+        if heuristic == 0 and problem.goal_test(node.state):
+            return node, priority
+
+        # Expand the current state, visiting the most promising children first
+        nodes_expanded += 1
+        actions = problem.actions(node.state)
+        if prune:
+            actions, pruned = commuting_actions(node, actions, table)
+            nodes_pruned += pruned
+        children = []
+        for action in actions:
+            child = node.child_node(action, problem)
+            nodes_generated += 1
+            best_cost = table.get(child.state)
+            if best_cost is not None and best_cost <= child.path_cost:
+                continue
+            if best_cost is not None or len(table) < max_nodes:
+                table[child.state] = child.path_cost
+            heuristic = problem.heuristic(child.state)
+            children.append((child.path_cost + heuristic, heuristic, child))
+        children.sort(key=lambda entry: entry[:2])
+
+        next_bound = None
+        for _, heuristic, child in children:
+            goal, cutoff = bounded_search(child, heuristic, bound, table)
+            if goal is not None:
+                return goal, cutoff
+            if cutoff is not None and (next_bound is None or cutoff < next_bound):
+                next_bound = cutoff
+
+        return None, next_bound
+
+    try:
+        root = SearchNode(problem.initial)
+        heuristic = problem.heuristic(root.state)
+        bound = root.path_cost + heuristic
+
+        while bound is not None:
+            goal, bound = bounded_search(root, heuristic, bound, {root.state: root.path_cost})
+            if goal is not None:
+                return goal
+
+        # Nothing was cut off, so the whole space has been searched without finding a solution
+        return None
+
+    finally:
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
+            stats.nodes_pruned += nodes_pruned
+
+
+class SearchTimeout(Exception):
+    """Raised by anytime_search when its deadline passes before any solution has been found. Unlike finding no
+    solution, this says nothing about whether the board can be solved."""
+
+
+def anytime_search(problem, deadline=None, weights=ANYTIME_WEIGHTS, stats=None):
+    """Runs anytime weighted A* on the problem, yielding a (node, bound) pair every time a cheaper solution is found
+    or the bound on the current solution is tightened. The bound is the proven ratio between the cost of the solution
+    and the optimal cost, so a bound of 1.0 means the solution is optimal. The bounds only hold for an admissible
+    heuristic, so with any heuristic but "pdb" the bound is always None: solutions still get cheaper, but none is
+    proven optimal. If the search finishes without yielding anything, the board has no solution.
+
+    The first pass is a greedy best-first search ordered by h alone, with ties broken towards deeper nodes, which
+    stops at its first solution. Even a large weight spends most of a short deadline widening the search across the
+    plateaus of the heuristic, whereas the greedy pass dives through them and finds a (long) solution within tens of
+    milliseconds on most boards. Each later pass is a weighted A* search ordered by g + w * h, working down from
+    w = 3 to w = 1. A pass stops once every node left in its open list has a weighted f-value of
+    at least the cost of the best solution so far, which proves that solution costs at most w times the optimum.
+    Nodes whose (unweighted) f-value cannot beat the best solution are never queued. The search stops early, keeping
+    the best solution found so far, once `deadline` (a time.monotonic() timestamp) has passed, or raises
+    SearchTimeout if it has found none."""
+    nodes_expanded = nodes_generated = 0
+    best = None
+    best_bound = float("inf")
+    admissible = problem.heuristic_name == "pdb"
+
+    root = SearchNode(problem.initial)
+    if problem.goal_test(root.state):
+        yield root, 1.0 if admissible else None
+        return
+    root_heuristic = problem.heuristic(root.state)
+
+    try:
+        for weight in weights:
+            greedy = weight == GREEDY
+            queue = HeapOpenList()
+            queue.push(root_heuristic if greedy else weight * root_heuristic, root_heuristic, root)
+            best_costs = {root.state: root.path_cost}
+
+            while queue:
+                if deadline is not None and time.monotonic() >= deadline:
+                    if best is None:
+                        raise SearchTimeout("No solution was found before the deadline")
+                    return
+
+                priority, _, node = queue.pop()
+                if best is not None and (greedy or priority >= best.path_cost):
+                    # Nothing left in the queue can beat the best solution by more than a factor of the weight
+                    break
+                if node.path_cost > best_costs[node.state]:
+                    continue
+
+                nodes_expanded += 1
+                for child in node.expand(problem):
+                    nodes_generated += 1
+                    best_cost = best_costs.get(child.state)
+                    if best_cost is not None and child.path_cost >= best_cost:
+                        continue
+                    best_costs[child.state] = child.path_cost
+
+                    # Check for goals as soon as they are generated, so a solution is reported as early as possible.
+                    # The root's heuristic value is a lower bound on the optimal cost until a pass proves better.
+                    if problem.goal_test(child.state):
+                        if best is None or child.path_cost < best.path_cost:
+                            best = child
+                            if root_heuristic > 0:
+                                best_bound = min(best_bound, best.path_cost / root_heuristic)
+                            yield best, best_bound if admissible else None
+                        continue
+
+                    heuristic = problem.heuristic(child.state)
+                    if best is None or child.path_cost + heuristic < best.path_cost:
+                        if greedy:
+                            # Break ties towards deeper nodes, so the pass dives through plateaus of the heuristic
+                            queue.push(heuristic, -child.path_cost, child)
+                        else:
+                            queue.push(child.path_cost + weight * heuristic, heuristic, child)
+            else:
+                # The queue ran out, so no solution can be cheaper than the best one (if there is one at all)
+                weight = 1
+
+            if best is not None and weight < best_bound and admissible:
+                best_bound = float(weight)
+                yield best, best_bound
+            if weight <= 1:
+                return
+
+    finally:
+        if stats is not None:
+            stats.nodes_expanded += nodes_expanded
+            stats.nodes_generated += nodes_generated
@@ -0,0 +1,186 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Races several solver configurations against each other on the same board, one
+process per configuration, and keeps the first answer. For example:
+
+    python -m search.portfolio test-vis*.csv --record wins.jsonl
+    python -m search.portfolio --summary wins.jsonl
+
+The first configuration to finish with a proven answer wins and the rest are
+cancelled. An answer is proven if it was found with the admissible "pdb"
+heuristic, or if the board has no solution (every configuration only gives up
+after searching every reachable board). The default "gaps" heuristic is not
+admissible, so an answer from a gaps configuration is usually, but not
+provably, optimal: it cannot win, and is only returned, marked as unproven,
+when no configuration proves an answer. The winners recorded with --record
+show which configurations are worth keeping in the default mix.
+"""
+
+import argparse
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from .board_io import parse_board
+from .core import Coord, PlayerColor, PlaceAction
+from .program import search
+from .stats import SearchStats
+
+# Keyword arguments for program.search. Anytime weighted A* is left out, since even with "pdb" its answers are only
+# proven optimal once it has finished its last (unweighted) pass, by which time one of these would have finished.
+PORTFOLIO = {
+    "astar": {"algorithm": "astar"},
+    "astar-bucket": {"algorithm": "astar", "open_list": "bucket"},
+    "astar-pdb": {"algorithm": "astar", "heuristic": "pdb"},
+    "ida": {"algorithm": "ida"},
+    "ida-pdb": {"algorithm": "ida", "heuristic": "pdb"},
+}
+
+# Seconds between checks that the configurations which have not reported are still running
+POLL_INTERVAL = 0.5
+
+
+def _run_configuration(name, board, target, options, results):
+    """Solves the board with one configuration and reports back. Runs in its own process."""
+    stats = SearchStats()
+    try:
+        sequence = search(board, target, stats=stats, **options)
+    except Exception as e:
+        results.put((name, "error", f"{type(e).__name__}: {e}", stats.as_dict()))
+    else:
+        # As in program.search, only "pdb" solutions are proven optimal, but a board with no solution always is
+        proven = sequence is None or options.get("heuristic") == "pdb"
+        results.put((name, "proven" if proven else "unproven", sequence, stats.as_dict()))
+
+
+def portfolio_search(
+    board: dict[Coord, PlayerColor],
+    target: Coord,
+    portfolio: dict[str, dict] = PORTFOLIO,
+    timeout: float | None = None
+) -> tuple[list[PlaceAction] | None, str | None, bool, dict]:
+    """Runs every configuration of the portfolio on the board at once and returns the first proven answer, as a
+    (solution, winner, proven, stats) tuple. The solution is None if the board has no solution. The other
+    configurations are stopped as soon as one proves its answer.
+
+    If every configuration finishes (or the timeout runs out) without proving an answer, the cheapest unproven
+    solution is returned instead, with proven set to False. The winner is None if there is no answer at all by the
+    timeout. A configuration whose process dies without reporting counts as failed, and RuntimeError is raised, with
+    each configuration's error, if every configuration failed."""
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    processes = {
+        name: context.Process(target=_run_configuration, daemon=True, args=(name, board, target, options, results))
+        for name, options in portfolio.items()
+    }
+    for process in processes.values():
+        process.start()
+
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    errors = {}
+    unproven = {}
+    try:
+        while len(errors) + len(unproven) < len(processes):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            # A process only exits after its answer has been flushed to the queue, so one which was already dead
+            # before a whole poll interval went by without anything arriving died without reporting
+            dead = [name for name, process in processes.items()
+                    if name not in errors and name not in unproven and not process.is_alive()]
+            try:
+                name, status, sequence, stats = results.get(
+                    timeout=POLL_INTERVAL if remaining is None else min(remaining, POLL_INTERVAL))
+            except queue.Empty:
+                for name in dead:
+                    errors[name] = f"Process exited with code {processes[name].exitcode} without an answer"
+                continue
+            if status == "proven":
+                return sequence, name, True, stats
+            if status == "unproven":
+                unproven[name] = (sequence, stats)
+            else:
+                errors[name] = sequence
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    if unproven:
+        name = min(unproven, key=lambda name: len(unproven[name][0]))
+        sequence, stats = unproven[name]
+        return sequence, name, False, stats
+    if len(errors) == len(processes):
+        raise RuntimeError("Every configuration failed: " + "; ".join(f"{name}: {error}"
+                                                                      for name, error in errors.items()))
+    return None, None, False, {}
+
+
+def summarise(record_path: str) -> Counter:
+    """Counts how many boards each configuration won, from a file written with --record."""
+    wins = Counter()
+    with open(record_path) as f:
+        for line in f:
+            if line.strip():
+                wins[json.loads(line)["winner"]] += 1
+    return wins
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.portfolio",
+                                     description="Race several solver configurations on each board.")
+    parser.add_argument("paths", nargs="*", help="board files to solve")
+    parser.add_argument("-t", "--timeout", type=float, default=None,
+                        help="time limit for each board in seconds (default: no limit)")
+    parser.add_argument("--only", nargs="+", choices=sorted(PORTFOLIO), metavar="NAME",
+                        help=f"configurations to race (default: all of {', '.join(PORTFOLIO)})")
+    parser.add_argument("--record", metavar="PATH", help="append the winner of each board to this JSON lines file")
+    parser.add_argument("--summary", metavar="PATH", help="print how often each configuration won, then exit")
+    args = parser.parse_args(argv)
+
+    if args.summary is not None:
+        for name, count in summarise(args.summary).most_common():
+            print(f"{name}\t{count}")
+        return 0
+
+    portfolio = {name: PORTFOLIO[name] for name in args.only} if args.only else PORTFOLIO
+    for path in args.paths:
+        result = {"board": path}
+        start = time.perf_counter()
+        try:
+            board, target = parse_board(Path(path).read_text())
+        except (OSError, ValueError) as e:
+            result.update(status="error", error=str(e), winner=None)
+        else:
+            try:
+                sequence, winner, proven, stats = portfolio_search(board, target, portfolio, args.timeout)
+            except RuntimeError as e:
+                result.update(status="error", error=str(e), solution=None, cost=None, winner=None)
+            else:
+                if winner is None:
+                    result.update(status="timeout", solution=None, cost=None, winner=None)
+                elif sequence is None:
+                    result.update(status="not_found", solution=None, cost=None, winner=winner, proven=proven)
+                else:
+                    result.update(status="solved", solution=[str(action) for action in sequence],
+                                  cost=len(sequence), winner=winner, proven=proven)
+                result.update(stats)
+        result["wall_time"] = time.perf_counter() - start
+        print(json.dumps(result), flush=True)
+
+        if args.record is not None and result["winner"] is not None and result["proven"]:
+            with open(args.record, "a") as f:
+                f.write(json.dumps({"board": path, "winner": result["winner"], "wall_time": result["wall_time"]}) + "\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
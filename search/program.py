@@ -1,14 +1,88 @@
 # COMP30024 Artificial Intelligence, Semester 1 2024
 # Project Part A: Single Player Tetress
 
+import time
+from contextlib import nullcontext
+from functools import partial
+
 from .core import PlayerColor, Coord, PlaceAction
 from .utils import render_board
-from .play_algorithms import SearchProblem, astar_search
+from .play_algorithms import (SearchProblem, astar_search, partial_expansion_search, ida_star_search,
+                              anytime_search, multi_target_search, SearchTimeout)
+from .parallel import hda_star_search
+from .external import external_astar_search
+from .open_lists import OPEN_LISTS
+from .stats import SearchStats
+from .cache import CachedProblem
+from .bitboard import BitBoard
+from .solution_cache import SolutionCache
+
+SEARCH_ALGORITHMS = {
+    "astar": astar_search,
+    "pea": partial_expansion_search,
+    "ida": ida_star_search,
+    "hda": hda_star_search,
+    "external": external_astar_search,
+}
+
+# The algorithms which take an open list from `open_lists.OPEN_LISTS`
+OPEN_LIST_ALGORITHMS = ("astar", "pea")
+# The algorithms which can prune commuting placements
+PRUNE_ALGORITHMS = ("astar", "ida")
+HEURISTICS = ("gaps", "pdb")
+
+
+def check_options(algorithm: str = "astar", time_budget: float | None = None, heuristic: str = "gaps",
+                  cache_size: int | None = None, open_list: str | None = None, prune: bool = False,
+                  memory_limit: int | None = None):
+    """Raises a ValueError if the options for `search` are unknown, of the wrong type, or do not go together, e.g. an
+    open list for an algorithm which has none. The options may come straight from a JSON request."""
+    if not isinstance(algorithm, str) or algorithm not in SEARCH_ALGORITHMS:
+        raise ValueError(f"Unknown algorithm {algorithm!r}, expected one of {', '.join(sorted(SEARCH_ALGORITHMS))}")
+    if not isinstance(heuristic, str) or heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic {heuristic!r}, expected one of {', '.join(HEURISTICS)}")
+    if time_budget is not None and (isinstance(time_budget, bool) or not isinstance(time_budget, (int, float))
+                                    or not time_budget > 0):
+        raise ValueError(f"The time budget must be a positive number of seconds, not {time_budget!r}")
+    if cache_size is not None and (isinstance(cache_size, bool) or not isinstance(cache_size, int) or cache_size <= 0):
+        raise ValueError(f"The cache size must be a positive whole number, not {cache_size!r}")
+    if open_list is not None:
+        if not isinstance(open_list, str) or open_list not in OPEN_LISTS:
+            raise ValueError(f"Unknown open list {open_list!r}, expected one of {', '.join(sorted(OPEN_LISTS))}")
+        if algorithm not in OPEN_LIST_ALGORITHMS:
+            raise ValueError(f"The {algorithm!r} algorithm does not take an open list, only "
+                             f"{' and '.join(OPEN_LIST_ALGORITHMS)} do")
+    if not isinstance(prune, bool):
+        raise ValueError(f"Prune must be True or False, not {prune!r}")
+    if prune and algorithm not in PRUNE_ALGORITHMS:
+        raise ValueError(f"The {algorithm!r} algorithm cannot prune, only {' and '.join(PRUNE_ALGORITHMS)} can")
+    if memory_limit is not None:
+        if algorithm != "external":
+            raise ValueError(f"The {algorithm!r} algorithm does not take a memory limit, only external does")
+        if isinstance(memory_limit, bool) or not isinstance(memory_limit, int) or memory_limit <= 0:
+            raise ValueError(f"The memory limit must be a positive number of bytes, not {memory_limit!r}")
+
+    # A time budget runs anytime weighted A* in place of the chosen algorithm, which has no other options
+    if time_budget is not None:
+        if algorithm != "astar":
+            raise ValueError(f"A time budget runs anytime A*, so cannot be used with the {algorithm!r} algorithm")
+        if open_list is not None or prune:
+            raise ValueError("A time budget runs anytime A*, which takes neither an open list nor pruning")
 
 
 def search(
     board: dict[Coord, PlayerColor], 
-    target: Coord
+    target: Coord,
+    stats: SearchStats | None = None,
+    profiler = None,
+    algorithm: str = "astar",
+    time_budget: float | None = None,
+    heuristic: str = "gaps",
+    cache_size: int | None = None,
+    solution_cache: SolutionCache | None = None,
+    open_list: str | None = None,
+    prune: bool = False,
+    memory_limit: int | None = None
 ) -> list[PlaceAction] | None:
     """
     This is the entry point for your submission. You should modify this
@@ -20,18 +94,136 @@ def search(
             coordinates to "player colours". The keys are `Coord` instances,
             and the values are `PlayerColor` instances.  
         `target`: the target BLUE coordinate to remove from the board.
+        `stats`: an optional SearchStats object, which is filled in with
+            statistics about the search (e.g. the number of nodes expanded).
+        `profiler`: an optional context manager which is entered around the
+            solve, e.g. `search.stats.cprofile_hook("solve.prof")`.
+        `algorithm`: the search algorithm to use, one of the keys of
+            `SEARCH_ALGORITHMS`. "astar" is the default, "pea" (partial
+            expansion A*) keeps far fewer children in the open list on boards
+            with many placements, "ida" (IDA*) uses far less memory on large,
+            sparse boards, "hda" (hash distributed A*) spreads a single
+            hard board across every CPU and "external" keeps within a memory
+            limit by spilling to disk.
+        `time_budget`: if given, run anytime weighted A* instead and return
+            the best solution found within this many seconds. Raises
+            SearchTimeout if no solution at all is found in time. The best
+            solution is only known to be optimal, and so only added to the
+            solution cache, when the search finishes with the admissible "pdb"
+            heuristic.
+        `heuristic`: "gaps" (the default) or "pdb" for the admissible line
+            pattern database heuristic, see `SearchProblem`.
+        `cache_size`: if given, memoise heuristic values and action lists for
+            up to this many boards each (see `cache.CachedProblem`).
+        `solution_cache`: an optional persistent SolutionCache. Boards which
+            are cached (up to symmetry) are answered without searching. Only
+            proven answers are added to the cache: optimal solutions found
+            with the admissible "pdb" heuristic, and boards which an
+            exhaustive search found to have no solution. The "gaps" heuristic
+            can overestimate, so its solutions are never cached.
+        `open_list`: for "astar" and "pea", the open list to use, one of the
+            keys of `open_lists.OPEN_LISTS`. The open lists break ties between equal
+            f-values differently, which suits different boards.
+        `prune`: for "astar" and "ida", skip placements which only reorder
+            commuting pieces (see `play_algorithms.commuting_actions`).
+        `memory_limit`: for the "external" algorithm, the number of bytes of
+            memory to use before spilling to disk.
     
     Returns:
         A list of "place actions" as PlaceAction instances, or `None` if no
         solution is possible.
+
+    Raises:
+        ValueError: if the options are unknown or do not go together, see
+            `check_options`.
+        SearchTimeout: if a time budget runs out before any solution is
+            found, which (unlike returning `None`) does not mean there is none.
     """
 
-    # Define a problem based off the initial state and run A* search to find the optimal solution
-    problem = SearchProblem(board, target)
-    result = astar_search(problem)
+    check_options(algorithm, time_budget, heuristic, cache_size, open_list, prune, memory_limit)
+    initial = BitBoard.from_dict(board)
+    if solution_cache is not None:
+        found, sequence = solution_cache.get(initial, target)
+        if found:
+            return sequence
+
+    # Define a problem based off the initial state and run A* search (or the chosen algorithm) to find the optimal
+    # solution
+    with profiler if profiler is not None else nullcontext():
+        problem = SearchProblem(initial, target, heuristic)
+        if cache_size is not None:
+            problem = CachedProblem(problem, cache_size)
+
+        if time_budget is None:
+            search_algorithm = SEARCH_ALGORITHMS[algorithm]
+            if open_list is not None:
+                search_algorithm = partial(search_algorithm, open_list=OPEN_LISTS[open_list])
+            if prune:
+                search_algorithm = partial(search_algorithm, prune=True)
+            if memory_limit is not None:
+                search_algorithm = partial(search_algorithm, memory_limit=memory_limit)
+            result = search_algorithm(problem, stats=stats)
+
+            # Each algorithm only gives up once it has searched every reachable board, so no solution is proven
+            # whatever the heuristic. A solution is only proven optimal with an admissible heuristic.
+            proven = result is None or heuristic == "pdb"
+        else:
+            # Keep the latest (and so cheapest) solution found before the deadline. If the search finishes without
+            # finding any, it has proven there is none.
+            result, bound = None, 1
+            for result, bound in anytime_search(problem, time.monotonic() + time_budget, stats=stats):
+                pass
+            proven = bound == 1
+
+        if cache_size is not None and stats is not None:
+            stats.caches = problem.cache_info()
 
     if result is not None:
-        # print(f"SOLUTION MAP:\n{render_board(result.state, target, ansi=True)}")
-        return result.solution()
+        # print(f"SOLUTION MAP:\n{render_board(result.state.to_dict(), target, ansi=True)}")
+        sequence = result.solution()
     else:
-        return None
+        sequence = None
+
+    if solution_cache is not None and proven:
+        solution_cache.put(initial, target, sequence)
+    return sequence
+
+
+def search_targets(
+    board: dict[Coord, PlayerColor],
+    targets: list[Coord] | None = None,
+    stats: SearchStats | None = None,
+    heuristic: str = "gaps",
+    open_list: str | None = None
+) -> dict[Coord, list[PlaceAction] | None]:
+    """
+    Solves the same board for many targets at once, e.g. to find the cheapest
+    way to remove each blue cell. Rather than one search per target, a single
+    search (see `play_algorithms.multi_target_search`) shares the placements,
+    line clears and transposition table between all of them.
+
+    Parameters:
+        `board`: the initial board state, as for `search`.
+        `targets`: the BLUE coordinates to remove. Defaults to every blue
+            cell on the board.
+        `stats`, `heuristic`, `open_list`: as for `search`.
+
+    Returns:
+        A dictionary mapping each target to its list of PlaceActions, or to
+        `None` if no solution is possible for it.
+
+    Raises:
+        ValueError: if the heuristic or open list is unknown.
+    """
+
+    # The search is an A* search, so takes the same heuristics and open lists as "astar" does
+    check_options(heuristic=heuristic, open_list=open_list)
+    initial = BitBoard.from_dict(board)
+    if targets is None:
+        targets = [coord for coord, color in board.items() if color == PlayerColor.BLUE]
+    if not targets:
+        return {}
+
+    problems = [SearchProblem(initial, target, heuristic) for target in targets]
+    nodes = multi_target_search(problems, OPEN_LISTS[open_list or "heap"], stats=stats)
+    return {target: node.solution() if node is not None else None for target, node in nodes.items()}
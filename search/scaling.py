@@ -0,0 +1,215 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Measures how the board-size-generic engine (see sized.py) scales with the size
+of the board. For each size, random boards with the same solution depth are
+solved, each in a fresh process, and the time and peak memory are reported
+along with the cost found, which should be the same for every size. For
+example:
+
+    python -m search.scaling --sizes 16 24 32 48 --boards 3
+    python -m search.scaling --plot scaling.png --json scaling.json
+
+Plotting needs matplotlib, which is optional; without it the table is still
+printed.
+"""
+
+import argparse
+import json
+import random
+import resource
+import signal
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .helpers import PIECE_SIZE
+from .sized import geometry, sized_search
+from .stats import SearchStats
+
+DEFAULT_SIZES = (16, 24, 32, 48)
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise _Timeout()
+
+
+def generate_board(board_n: int, seed: int, gap_pieces: int = 1, distance: int = 4, shift: int = 3,
+                   density: float = 0.3):
+    """Generates a random board whose solution depth does not depend on its size. The target's row is full apart
+    from a gap of `gap_pieces` * 4 squares. A red I piece lies `distance` rows away from the target's row and `shift`
+    columns past the end of the gap, and an L-shaped corridor of empty squares leads from it to the row next to the
+    gap: up to that row, then along it. The rest of the board is scattered with blue squares.
+
+    The heuristic only sees how far the red piece is from the target's row, not that it is off to one side, so the
+    search has to work its way along the corridor rather than being led straight to the answer. The corridor stays
+    the shortest way round only if the board is large enough, so smaller boards raise a ValueError. Returns
+    (occupied, red, target) as for sized_search."""
+    rng = random.Random(seed)
+    gap = gap_pieces * PIECE_SIZE
+    width = gap + shift + PIECE_SIZE
+    if board_n < width + PIECE_SIZE + 1 or board_n <= 3 * distance:
+        raise ValueError(f"A {board_n}x{board_n} board is too small for a gap of {gap} squares with the red piece "
+                         f"{distance} rows away and {shift} columns past it")
+
+    target_r = rng.randrange(board_n)
+    start = rng.randrange(board_n)
+    gap_cols = {(start + i) % board_n for i in range(gap)}
+    target_c = rng.choice([c for c in range(board_n) if c not in gap_cols])
+
+    def bit(r, c):
+        return 1 << (r % board_n * board_n + c % board_n)
+
+    red_c = start + gap + shift
+    red = corridor = 0
+    for i in range(PIECE_SIZE):
+        red |= bit(target_r + distance, red_c + i)
+        for r in range(1, distance):
+            corridor |= bit(target_r + r, red_c + i)
+    for c in range(start, red_c + PIECE_SIZE):
+        corridor |= bit(target_r + 1, c)
+
+    occupied = red
+    for c in range(board_n):
+        if c not in gap_cols:
+            occupied |= bit(target_r, c)
+
+    # Scatter blue squares everywhere except the target's lines and the corridor
+    for r in range(board_n):
+        if r == target_r:
+            continue
+        for c in range(board_n):
+            if c != target_c and not (occupied | corridor) & bit(r, c) and rng.random() < density:
+                occupied |= bit(r, c)
+
+    return occupied, red, (target_r, target_c)
+
+
+def measure_size(board_n: int, seed: int, timeout: float | None, gap_pieces: int = 1, distance: int = 4,
+                 shift: int = 3) -> dict:
+    """Builds the tables for a board size and solves one generated board. Runs in a fresh process, so the peak RSS
+    is for this board alone."""
+    start = time.perf_counter()
+    geometry(board_n)
+    tables_time = time.perf_counter() - start
+
+    occupied, red, target = generate_board(board_n, seed, gap_pieces, distance, shift)
+    stats = SearchStats()
+    result = {"size": board_n, "seed": seed, "tables_time": tables_time}
+
+    if timeout is not None:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    start = time.perf_counter()
+    try:
+        solution = sized_search(board_n, occupied, red, target, stats=stats)
+        result.update(status="solved" if solution is not None else "not_found",
+                      cost=len(solution) if solution is not None else None)
+    except _Timeout:
+        result.update(status="timeout", cost=None)
+    finally:
+        if timeout is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    result["solve_time"] = time.perf_counter() - start
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result.update(stats.as_dict())
+    return result
+
+
+def summarise(results: list[dict]) -> list[dict]:
+    """Takes the median of every measurement for each board size."""
+    summary = []
+    for board_n in sorted({result["size"] for result in results}):
+        runs = [result for result in results if result["size"] == board_n]
+        summary.append({
+            "size": board_n,
+            "boards": len(runs),
+            "timeouts": sum(result["status"] == "timeout" for result in runs),
+            **{key: statistics.median(result[key] for result in runs)
+               for key in ("tables_time", "solve_time", "peak_rss_kb", "nodes_expanded", "nodes_generated")},
+            "cost": statistics.median(result["cost"] for result in runs if result["cost"] is not None)
+            if any(result["cost"] is not None for result in runs) else None,
+        })
+    return summary
+
+
+def plot(summary: list[dict], path: str):
+    """Plots time and memory against board size. Needs matplotlib."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    sizes = [row["size"] for row in summary]
+    fig, (time_axes, memory_axes) = plt.subplots(1, 2, figsize=(10, 4))
+    time_axes.plot(sizes, [row["solve_time"] for row in summary], marker="o", label="solve")
+    time_axes.plot(sizes, [row["tables_time"] for row in summary], marker="o", label="tables")
+    time_axes.set_xlabel("board size N")
+    time_axes.set_ylabel("median time (s)")
+    time_axes.legend()
+    memory_axes.plot(sizes, [row["peak_rss_kb"] / 1024 for row in summary], marker="o")
+    memory_axes.set_xlabel("board size N")
+    memory_axes.set_ylabel("median peak RSS (MB)")
+    fig.tight_layout()
+    fig.savefig(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.scaling",
+                                     description="Benchmark the search against the size of the board.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help=f"board sizes to test (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--boards", type=int, default=3, help="random boards per size (default: 3)")
+    parser.add_argument("--gap-pieces", type=int, default=1,
+                        help="pieces needed to fill the gap in the target's row (default: 1)")
+    parser.add_argument("--distance", type=int, default=4,
+                        help="rows between the red piece and the target's row (default: 4)")
+    parser.add_argument("--shift", type=int, default=3,
+                        help="columns between the end of the gap and the red piece (default: 3)")
+    parser.add_argument("--timeout", type=float, default=60, help="time limit for each board in seconds (default: 60)")
+    parser.add_argument("--json", metavar="PATH", help="write every measurement to this file")
+    parser.add_argument("--plot", metavar="PATH", help="plot time and memory against size to this image (matplotlib)")
+    args = parser.parse_args(argv)
+    for board_n in args.sizes:
+        try:
+            generate_board(board_n, 0, args.gap_pieces, args.distance, args.shift)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = []
+    for board_n in args.sizes:
+        for seed in range(args.boards):
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(measure_size, board_n, seed, args.timeout, args.gap_pieces,
+                                               args.distance, args.shift).result())
+
+    summary = summarise(results)
+    print(f"{'size':>5} {'cost':>5} {'tables':>8} {'solve':>8} {'rss MB':>8} {'expanded':>9} {'generated':>10} "
+          f"{'timeouts':>8}")
+    for row in summary:
+        cost = f"{row['cost']:>5.0f}" if row["cost"] is not None else f"{'-':>5}"
+        print(f"{row['size']:>5} {cost} {row['tables_time']:>8.2f} {row['solve_time']:>8.2f} "
+              f"{row['peak_rss_kb'] / 1024:>8.1f} {row['nodes_expanded']:>9.0f} {row['nodes_generated']:>10.0f} "
+              f"{row['timeouts']:>8}")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "summary": summary}, f, indent=2)
+
+    if args.plot is not None:
+        try:
+            plot(summary, args.plot)
+        except ImportError:
+            print("matplotlib is not installed, so no plot was made", file=sys.stderr)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+The single player search on toroidal boards of any size, e.g. 16, 24 or 32
+squares across. core.py (and so Coord, PlaceAction and everything built on
+them) is fixed to BOARD_N, so this engine works on its own board geometry
+and returns solutions as lists of (row, column) cells instead of PlaceActions.
+
+Boards are bitmasks of size * size bits, and placements are indices into the
+geometry's placement table, so the existing open lists and search algorithms
+(which only ever see states, actions and costs) run unchanged.
+"""
+
+from functools import lru_cache
+
+from .bitboard import mask_indices
+from .core import BOARD_N
+from .helpers import PIECE_SIZE
+from .open_lists import HeapOpenList
+from .placement_algorithms import build_placement_index
+from .play_algorithms import PATH_COST, astar_search
+
+
+class Geometry:
+    """Every table which depends on the size of the board: row and column masks, and the placement index."""
+
+    def __init__(self, board_n: int):
+        self.board_n = board_n
+        self.cell_count = board_n * board_n
+        self.full_mask = (1 << self.cell_count) - 1
+
+        self.row_masks = tuple(((1 << board_n) - 1) << (r * board_n) for r in range(board_n))
+        self.col_masks = tuple(sum(1 << (r * board_n + c) for r in range(board_n)) for c in range(board_n))
+        self.not_first_col = self.full_mask & ~self.col_masks[0]
+        self.not_last_col = self.full_mask & ~self.col_masks[-1]
+
+        # Number of empty lines between a line and another line i steps away from it on the torus
+        self.line_distance = tuple(max(min(i, board_n - i) - 1, 0) for i in range(board_n))
+
+        self.placement_masks, self.placements_by_cell = build_placement_index(board_n)
+        lines = self.row_masks + self.col_masks
+        self.placement_lines = tuple(tuple(line for line in lines if line & mask) for mask in self.placement_masks)
+
+    def neighbours(self, mask: int) -> int:
+        """Returns the mask of every cell orthogonally adjacent to a cell in the given mask, wrapping around."""
+        n, cells = self.board_n, self.cell_count
+        up = (mask >> n) | (mask << (cells - n))
+        down = (mask << n) | (mask >> (cells - n))
+        left = ((mask & self.not_first_col) >> 1) | ((mask & self.col_masks[0]) << (n - 1))
+        right = ((mask & self.not_last_col) << 1) | ((mask & self.col_masks[-1]) >> (n - 1))
+        return (up | down | left | right) & self.full_mask
+
+    def cells(self, mask: int) -> list[tuple[int, int]]:
+        """Unpacks a mask into a sorted list of (row, column) cells."""
+        return [divmod(i, self.board_n) for i in mask_indices(mask)]
+
+
+@lru_cache(maxsize=None)
+def geometry(board_n: int) -> Geometry:
+    """Returns the (shared) geometry for a board size, building its tables on first use."""
+    return Geometry(board_n)
+
+
+class SizedBoard:
+    """Board state for any board size: bitmasks of the occupied and the red cells. The hash is computed once, as
+    boards are never changed after they are made."""
+
+    __slots__ = ("occupied", "red", "key")
+
+    def __init__(self, occupied: int, red: int):
+        self.occupied = occupied
+        self.red = red
+        self.key = hash((occupied, red))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SizedBoard) and self.occupied == other.occupied and self.red == other.red
+
+    def __hash__(self) -> int:
+        return self.key
+
+
+class SizedProblem:
+    """The search problem on a board of any size. Actions are indices into the geometry's placement table.
+
+    The heuristic is the admissible one from SearchProblem.pattern_heuristic without the pattern database: for the
+    target's row and column, a quarter of the empty squares in the line (a piece covers at most 4 of them), plus the
+    pieces needed to bridge the gap between the closest red square and the line, taking the cheaper line."""
+
+    def __init__(self, board_n: int, occupied: int, red: int, target: tuple[int, int]):
+        self.geometry = geometry(board_n)
+        self.initial = SizedBoard(occupied, red)
+        self.target = target
+        self.target_row = self.geometry.row_masks[target[0]]
+        self.target_col = self.geometry.col_masks[target[1]]
+
+    def actions(self, state):
+        """Finds every placement which is adjacent to a red square and only covers empty squares."""
+        geometry = self.geometry
+        masks = geometry.placement_masks
+        occupied = state.occupied
+        placements = []
+        seen = set()
+
+        for cell in mask_indices(geometry.neighbours(state.red) & ~occupied):
+            for placement in geometry.placements_by_cell[cell]:
+                if placement not in seen and not masks[placement] & occupied:
+                    seen.add(placement)
+                    placements.append(placement)
+
+        return placements
+
+    def result(self, state, action):
+        """Places the piece, then clears any of its rows and columns which are full (unless the target's line was
+        completed, which ends the game)."""
+        piece = self.geometry.placement_masks[action]
+        occupied = state.occupied | piece
+        red = state.red | piece
+        new_state = SizedBoard(occupied, red)
+
+        if not self.goal_test(new_state):
+            cleared = 0
+            for line in self.geometry.placement_lines[action]:
+                if occupied & line == line:
+                    cleared |= line
+            if cleared:
+                new_state = SizedBoard(occupied & ~cleared, red & ~cleared)
+
+        return new_state
+
+    def heuristic(self, state):
+        geometry = self.geometry
+        n = geometry.board_n
+        target_r, target_c = self.target
+        row_distance = col_distance = 2 * n
+
+        for i in range(n):
+            if state.red & geometry.col_masks[(target_c + i) % n]:
+                row_distance = min(row_distance, geometry.line_distance[i])
+            if state.red & geometry.row_masks[(target_r + i) % n]:
+                col_distance = min(col_distance, geometry.line_distance[i])
+
+        col_pieces = self.line_pieces(state.occupied, self.target_col, row_distance)
+        row_pieces = self.line_pieces(state.occupied, self.target_row, col_distance)
+        return PATH_COST * min(col_pieces, row_pieces)
+
+    def line_pieces(self, occupied, line, distance):
+        """Lower bound on the pieces needed to complete a line, given the number of empty lines between it and the
+        closest red square."""
+        empty = self.geometry.board_n - (occupied & line).bit_count()
+        if not empty:
+            return 0
+        return -(-empty // PIECE_SIZE) + -(-max(distance - (PIECE_SIZE - 1), 0) // PIECE_SIZE)
+
+    def goal_test(self, state):
+        occupied = state.occupied
+        return occupied & self.target_row == self.target_row or occupied & self.target_col == self.target_col
+
+    def path_cost(self, prev_cost):
+        return prev_cost + PATH_COST
+
+
+def parse_sized_board(text: str, board_n: int = BOARD_N) -> tuple[int, int, int, tuple[int, int]]:
+    """Parses a board in the usual CSV format, of any size. The size must be given for boards other than the usual
+    BOARD_N, since a board file can leave out empty rows and columns at its end. Returns the board size, the occupied
+    and red masks, and the target cell."""
+    rows = text.strip().split("\n")
+    occupied = red = 0
+    target = None
+
+    for r, line in enumerate(rows):
+        if line.strip() == "" or line[0] == "#":
+            continue
+        for c, p in enumerate(line.split(",")):
+            p = p.strip()
+            if p == "":
+                continue
+            if p.lower() not in ("r", "b"):
+                raise ValueError(f"Invalid cell {p!r} at {r}-{c}")
+            if r >= board_n or c >= board_n:
+                raise ValueError(f"Cell {r}-{c} is outside the {board_n}x{board_n} board")
+            bit = 1 << (r * board_n + c)
+            occupied |= bit
+            if p.lower() == "r":
+                red |= bit
+            if p == "B":
+                target = (r, c)
+
+    if target is None:
+        raise ValueError("Target coordinate 'B' not found")
+
+    return board_n, occupied, red, target
+
+
+def sized_search(board_n: int, occupied: int, red: int, target: tuple[int, int], open_list=HeapOpenList,
+                 stats=None) -> list[list[tuple[int, int]]] | None:
+    """Solves a board of any size with A* search. Returns the cells of each piece to place, in order, or None if no
+    solution is possible."""
+    problem = SizedProblem(board_n, occupied, red, target)
+    node = astar_search(problem, open_list, stats)
+    if node is None:
+        return None
+    return [problem.geometry.cells(problem.geometry.placement_masks[action]) for action in node.solution()]
@@ -0,0 +1,113 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import json
+import sqlite3
+
+from .core import Coord, PlaceAction, BOARD_N
+from .bitboard import BitBoard, CELL_COUNT, INDEX_COORDS, coords_mask, mask_indices, translate
+
+# The eight rotations and reflections of the board about the origin, as functions of the (row, column) offset of a
+# cell from the target. Coord arithmetic wraps around the edges of the board, so moving every cell by one of these
+# (and by any translation) gives a board with exactly the same solutions, moved in the same way.
+SYMMETRIES = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, -r),
+    lambda r, c: (-r, -c),
+    lambda r, c: (-c, r),
+    lambda r, c: (r, -c),
+    lambda r, c: (-r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (-c, -r),
+)
+
+
+def _permutation(symmetry):
+    """Returns the cell each cell is moved to by a symmetry."""
+    permutation = []
+    for i in range(CELL_COUNT):
+        r, c = symmetry(*divmod(i, BOARD_N))
+        permutation.append(r % BOARD_N * BOARD_N + c % BOARD_N)
+    return tuple(permutation)
+
+
+PERMUTATIONS = tuple(_permutation(symmetry) for symmetry in SYMMETRIES)
+INVERSE_PERMUTATIONS = tuple(
+    tuple(permutation.index(i) for i in range(CELL_COUNT)) for permutation in PERMUTATIONS
+)
+
+
+def permute(mask: int, permutation) -> int:
+    """Moves every cell of a mask according to a permutation of the cells."""
+    moved = 0
+    for i in mask_indices(mask):
+        moved |= 1 << permutation[i]
+    return moved
+
+
+def canonical_form(board: BitBoard, target: Coord):
+    """Moves the target to the origin and picks the smallest of the board's eight rotations and reflections. Returns
+    the canonical (occupied, red) masks along with the index of the symmetry used to reach them."""
+    occupied = translate(board.occupied, -target.r, -target.c)
+    red = translate(board.red, -target.r, -target.c)
+
+    return min(
+        (permute(occupied, permutation), permute(red, permutation), symmetry)
+        for symmetry, permutation in enumerate(PERMUTATIONS)
+    )
+
+
+class SolutionCache:
+    """Persistent cache of solutions which is shared by every board that is the same up to a translation, rotation or
+    reflection of the torus. Solutions are stored in the canonical orientation of their board, in an SQLite database
+    so that the cache survives between runs and can be shared between processes."""
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (board TEXT PRIMARY KEY, solution TEXT)")
+
+    @staticmethod
+    def _key(occupied, red):
+        return f"{occupied:x}:{red:x}"
+
+    def get(self, board: BitBoard, target: Coord):
+        """Looks up a board. Returns a (found, solution) pair: found is False if the board is not cached, otherwise
+        solution is the list of PlaceActions moved back to the caller's orientation (or None if there is no
+        solution)."""
+        occupied, red, symmetry = canonical_form(board, target)
+        row = self.connection.execute(
+            "SELECT solution FROM solutions WHERE board = ?", (self._key(occupied, red),)).fetchone()
+        if row is None:
+            return False, None
+
+        pieces = json.loads(row[0])
+        if pieces is None:
+            return True, None
+
+        inverse = INVERSE_PERMUTATIONS[symmetry]
+        solution = []
+        for cells in pieces:
+            mask = translate(permute(sum(1 << i for i in cells), inverse), target.r, target.c)
+            solution.append(PlaceAction(*(INDEX_COORDS[i] for i in mask_indices(mask))))
+        return True, solution
+
+    def put(self, board: BitBoard, target: Coord, solution: list[PlaceAction] | None):
+        """Stores a board's solution (or None if it has no solution). Every entry is trusted as optimal by `get`, so
+        only proven answers should be stored, see `program.search`."""
+        occupied, red, symmetry = canonical_form(board, target)
+        permutation = PERMUTATIONS[symmetry]
+
+        pieces = None
+        if solution is not None:
+            pieces = []
+            for action in solution:
+                mask = translate(coords_mask(action.coords), -target.r, -target.c)
+                pieces.append(list(mask_indices(permute(mask, permutation))))
+
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)",
+                                    (self._key(occupied, red), json.dumps(pieces)))
+
+    def close(self):
+        self.connection.close()
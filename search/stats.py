@@ -0,0 +1,106 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+import cProfile
+import time
+from contextlib import contextmanager
+
+PHASES = ("actions", "result", "heuristic", "queue")
+
+
+class SearchStats:
+    """Counters describing a single run of a search algorithm. Pass an instance to astar_search (or program.search)
+    and it will be filled in when the search finishes. Node counts are always recorded. Per-phase timing wraps the
+    problem and the open list in timers, so it is only switched on when `timing` is set; without a SearchStats object
+    the search runs exactly as it would otherwise."""
+
+    def __init__(self, timing=False):
+        self.timing = timing
+        self.nodes_expanded = 0
+        self.nodes_generated = 0
+        self.nodes_deduplicated = 0
+        self.nodes_pruned = 0
+        self.max_frontier = 0
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.caches = {}
+
+    def as_dict(self):
+        """Return the statistics as a dictionary, e.g. for JSON output."""
+        stats = {
+            "nodes_expanded": self.nodes_expanded,
+            "nodes_generated": self.nodes_generated,
+            "nodes_deduplicated": self.nodes_deduplicated,
+            "nodes_pruned": self.nodes_pruned,
+            "max_frontier": self.max_frontier,
+        }
+        if self.timing:
+            stats.update((f"{phase}_time", seconds) for phase, seconds in self.phase_times.items())
+        if self.caches:
+            stats["caches"] = self.caches
+        return stats
+
+
+class TimedProblem:
+    """Wraps a search problem, adding the time spent in each of its methods to a SearchStats object."""
+
+    def __init__(self, problem, stats):
+        self.problem = problem
+        self.times = stats.phase_times
+
+    def actions(self, state):
+        start = time.perf_counter()
+        actions = self.problem.actions(state)
+        self.times["actions"] += time.perf_counter() - start
+        return actions
+
+    def result(self, state, action):
+        start = time.perf_counter()
+        result = self.problem.result(state, action)
+        self.times["result"] += time.perf_counter() - start
+        return result
+
+    def heuristic(self, state):
+        start = time.perf_counter()
+        heuristic = self.problem.heuristic(state)
+        self.times["heuristic"] += time.perf_counter() - start
+        return heuristic
+
+    def __getattr__(self, name):
+        # Everything else (goal_test, path_cost, initial, target, ...) goes straight to the problem
+        return getattr(self.problem, name)
+
+
+class TimedOpenList:
+    """Wraps an open list, adding the time spent pushing and popping to a SearchStats object."""
+
+    def __init__(self, open_list, stats):
+        self.open_list = open_list
+        self.times = stats.phase_times
+
+    def push(self, priority, heuristic, item):
+        start = time.perf_counter()
+        self.open_list.push(priority, heuristic, item)
+        self.times["queue"] += time.perf_counter() - start
+
+    def pop(self):
+        start = time.perf_counter()
+        entry = self.open_list.pop()
+        self.times["queue"] += time.perf_counter() - start
+        return entry
+
+    def __len__(self):
+        return len(self.open_list)
+
+
+@contextmanager
+def cprofile_hook(path):
+    """Profiler hook for program.search which profiles the solve with cProfile and writes the results to `path`,
+    ready for `python -m pstats` or snakeviz. Any other context manager (e.g. one which starts and stops a sampling
+    profiler) can be used as a hook in the same way."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
@@ -0,0 +1,131 @@
+# COMP30024 Artificial Intelligence, Semester 1 2024
+# Project Part A: Single Player Tetress
+
+"""
+Solves a stream of boards piped through stdin, one after another, without
+starting a new process for each board. For example:
+
+    for f in test-vis*.csv; do echo "# $f"; cat $f; echo; done | python -m search.stream
+    python generate_boards.py | python -m search.stream --workers 4
+
+Boards are in the usual CSV format, separated by blank lines or by `#` header
+lines. A header names the board that follows it (e.g. `# board-17`); boards
+without one are numbered from 1. Boards may have fewer than BOARD_N rows, and
+board files often lack a trailing newline, so concatenated files need a header
+or blank line between them, as above.
+
+The output for each board is a `# <name>` header followed by its `$SOLUTION`
+lines, exactly as the main program prints them, so splitting the output on
+the headers gives the usual output for each board.
+"""
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Iterable, Iterator
+
+from .core import Coord, PlayerColor, PlaceAction
+from .__main__ import print_result
+from .board_io import parse_board
+from .program import search, SEARCH_ALGORITHMS
+
+# (name, solution, error) for one board of a stream, where error is set instead of the solution for an invalid board
+StreamResult = tuple[str, list[PlaceAction] | None, str | None]
+
+
+def split_boards(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
+    """Splits a stream of lines into (name, text) pairs, one per board. Only one board is held at a time."""
+    name = None
+    rows = []
+    count = 0
+
+    for line in lines:
+        line = line.rstrip("\n")
+        header = line.lstrip().startswith("#")
+        if rows and (header or line.strip() == ""):
+            count += 1
+            yield name or str(count), "\n".join(rows)
+            name, rows = None, []
+        if header:
+            name = line.lstrip()[1:].strip() or None
+        elif line.strip() != "":
+            rows.append(line)
+
+    if rows:
+        count += 1
+        yield name or str(count), "\n".join(rows)
+
+
+def read_boards(lines: Iterable[str]) -> Iterator[tuple[str, dict[Coord, PlayerColor], Coord]]:
+    """Reads a stream of boards, yielding a (name, board, target) triple for each. Raises ValueError on the first
+    invalid board."""
+    for name, text in split_boards(lines):
+        board, target = parse_board(text)
+        yield name, board, target
+
+
+def _solve_text(name: str, text: str, options: dict) -> StreamResult:
+    """Parses and solves one board, returning (name, solution, error). Runs inside a worker process when solving in
+    parallel."""
+    try:
+        board, target = parse_board(text)
+    except ValueError as e:
+        return name, None, str(e)
+    return name, search(board, target, **options), None
+
+
+def solve_stream(lines: Iterable[str], workers: int = 1, **options) -> Iterator[StreamResult]:
+    """Solves every board in a stream of lines, yielding (name, solution, error) as each board is finished. The
+    options are passed on to `program.search`.
+
+    With one worker the boards are solved in order in this process. With more, boards are solved in a pool of worker
+    processes and results come back in the order they finish. Only a couple of boards per worker are read ahead of
+    the solver, so memory use stays flat however many boards are piped through."""
+    boards = split_boards(lines)
+    if workers <= 1:
+        for name, text in boards:
+            yield _solve_text(name, text, options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for name, text in boards:
+            pending.add(executor.submit(_solve_text, name, text, options))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        # Drain the last few boards, again in the order they finish
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m search.stream",
+                                     description="Solve a stream of boards read from stdin.")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("-a", "--algorithm", choices=sorted(SEARCH_ALGORITHMS), default="astar",
+                        help="search algorithm to use (default: astar)")
+    parser.add_argument("--heuristic", choices=("gaps", "pdb"), default="gaps",
+                        help="heuristic to use (default: gaps)")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for name, sequence, error in solve_stream(sys.stdin, args.workers, algorithm=args.algorithm,
+                                              heuristic=args.heuristic):
+        print(f"# {name}")
+        if error is not None:
+            print(f"Error parsing input: {error}")
+            status = 1
+        else:
+            print_result(sequence)
+        sys.stdout.flush()
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())